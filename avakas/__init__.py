@@ -2,7 +2,8 @@
 avakas main load
 """
 
-from avakas import flavors
+import importlib
+
 from avakas.errors import AvakasError
 from avakas.avakas import Avakas, register_flavor
 
@@ -12,3 +13,11 @@ __all__ = [
     'register_flavor',
     'flavors',
 ]
+
+
+def __getattr__(name):
+    """Built-in flavors are only imported when first used"""
+    if name == 'flavors':
+        return importlib.import_module('avakas.flavors')
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,117 @@
+"""
+Avakas Version Ancestry
+
+Resolves the nearest version for many commits at once, i.e. to index
+the versions of historical builds. The history shared by every commit
+asked about is read in a single `git rev-list` pass, parents before
+children, and the nearest version of each commit is built from those of
+its parents. No commit is looked at twice however much the histories
+overlap, and the tag index is only consulted for each commit once.
+"""
+
+import subprocess
+
+from avakas.errors import AvakasError
+
+
+def resolve_commits(directory, revs):
+    """
+    Resolve revisions (shas, branches, tags and so on) to commit shas
+    with a single `git cat-file` process.
+
+    Returns:
+        * `list` of the `str` sha of each revision, None where it does
+          not name a commit
+    """
+    if not revs:
+        return []
+
+    # revisions are one per line, which they cannot contain anyway
+    query = ''.join(f"{rev}^{{commit}}\n" for rev in revs)
+    try:
+        output = subprocess.run(['git', 'cat-file',
+                                 '--batch-check=%(objectname) %(objecttype)'],
+                                cwd=directory,
+                                input=query.encode('utf8'),
+                                check=True,
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL).stdout
+    except subprocess.CalledProcessError as err:
+        raise AvakasError(f"Unable to resolve commits in {directory}") \
+            from err
+
+    shas = []
+    for line in output.decode('utf8', errors='replace').splitlines():
+        sha, _sep, kind = line.rpartition(' ')
+        shas.append(sha if kind == 'commit' else None)
+
+    return shas
+
+
+def _nearer(current, candidate):
+    """
+    The nearer of two (`int` distance, version) tuples, the higher
+    version when they are as near. Either may be None.
+    """
+    if current is None:
+        return candidate
+    if candidate is None or candidate[0] > current[0]:
+        return current
+    if candidate[0] < current[0] or candidate[1] > current[1]:
+        return candidate
+
+    return current
+
+
+def nearest_versions(directory, commits, tag_index):
+    """
+    The nearest version tagged on each of `commits` or their ancestors,
+    going by the fewest commits between them, and the highest version
+    where several are as near. `tag_index` is the
+    `avakas.tags.TagIndex` of version tags to go by.
+
+    Returns:
+        * `dict` of `str` sha to (`int` commits away, version), or to
+          None for commits with no version in their history
+    """
+    commits = sorted(set(commits))
+    if not commits:
+        return {}
+
+    # pylint: disable=consider-using-with
+    proc = subprocess.Popen(['git', 'rev-list', '--reverse', '--topo-order',
+                             '--parents', '--stdin'],
+                            cwd=directory,
+                            stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL)
+    nearest = {}
+    try:
+        proc.stdin.write(''.join(f"{sha}\n" for sha in commits)
+                         .encode('ascii'))
+        proc.stdin.close()
+        for line in proc.stdout:
+            sha, *parents = line.decode('ascii').split()
+            version = tag_index.version_at(sha)
+            if version is not None:
+                nearest[sha] = (0, version)
+                continue
+
+            found = None
+            for parent in parents:
+                # parents beyond the boundary of a shallow clone are unknown
+                parent_nearest = nearest.get(parent)
+                if parent_nearest is not None:
+                    found = _nearer(found, (parent_nearest[0] + 1,
+                                            parent_nearest[1]))
+            nearest[sha] = found
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        proc.wait()
+
+    if proc.returncode != 0:
+        raise AvakasError(f"Unable to read git history in {directory}")
+
+    return {sha: nearest.get(sha) for sha in commits}
@@ -2,17 +2,82 @@
 Avakas classes and plugin handlers
 """
 
-import copy
 import datetime
+import importlib
+from collections.abc import MutableMapping
 
 from semantic_version import Version
 
 from avakas.errors import AvakasError
+from avakas.patcher import regex_locator
+from avakas.refs import find_git_dir
+from avakas.semver import SemVer
+from avakas.workspace import Workspace
+
+
+# built-in flavors and the modules registering them, imported on first use
+BUILTIN_FLAVORS = {
+    'legacy': 'avakas.flavors.base',
+    'git-native': 'avakas.flavors.git',
+    'ansible': 'avakas.flavors.ansible',
+    'chef': 'avakas.flavors.chef',
+    'erlang': 'avakas.flavors.erlang',
+    'node': 'avakas.flavors.node',
+}
+
+
+class FlavorRegistry(MutableMapping):
+    """
+    Maps flavor names to flavor classes. Flavors which are only known
+    by the module registering them are imported when first looked up,
+    so listing flavor names is free.
+    """
+
+    def __init__(self, modules=None):
+        self._modules = dict(modules or {})
+        self._flavors = {}
+
+    def __getitem__(self, name):
+        if name not in self._flavors and name in self._modules:
+            importlib.import_module(self._modules[name])
+
+        return self._flavors[name]
+
+    def __setitem__(self, name, project):
+        self._flavors[name] = project
+
+    def __delitem__(self, name):
+        if name not in self:
+            raise KeyError(name)
+
+        self._flavors.pop(name, None)
+        self._modules.pop(name, None)
+
+    def __contains__(self, name):
+        return name in self._flavors or name in self._modules
+
+    def __iter__(self):
+        yield from self._modules
+        for name in self._flavors:
+            if name not in self._modules:
+                yield name
+
+    def __len__(self):
+        return len(set(self._modules) | set(self._flavors))
 
 
 def detect_project_flavor(**kwargs):
     """
-    Determines the project flavor for a given directory
+    Determines the project flavor for a given directory and returns
+    an instance of it
+    """
+    return detect_flavor_class(**kwargs)(**kwargs)
+
+
+def detect_flavor_class(**kwargs):
+    """
+    Determines the project flavor class for a given directory, without
+    instantiating it
     """
 
     flavor = kwargs.get('flavor', 'auto')
@@ -36,20 +101,25 @@ def detect_project_flavor(**kwargs):
         else:
             raise AvakasError(f"Unable to find flavor {flavor}")
 
-    return project(**kwargs)
+    return project
 
 
 class Avakas():
     """
     Main instance of Avakas associated to a project and it's version
     """
-    project_flavors = {}
+    project_flavors = FlavorRegistry(BUILTIN_FLAVORS)
+    # bytes regex matching the version in a project file as group `vsn`
+    VERSION_PATTERN = None
 
-    def __init__(self, directory, tag_prefix='v', **kwargs):
-        self._version = Version('0.0.0')
+    def __init__(self, directory, tag_prefix='v', workspace=None, **kwargs):
+        self._version = SemVer(0, 0, 0)
         self.tag_prefix = tag_prefix or ''
         self.directory = directory[0]
+        self.workspace = workspace or Workspace()
         self.options = kwargs
+        # (remote, refspecs) left to the caller with the defer_push option
+        self.pending_push = None
 
     @property
     def version(self):
@@ -61,7 +131,10 @@ class Avakas():
     def version(self, version):
         """Set version"""
 
-        if not isinstance(version, Version):
+        if isinstance(version, Version):
+            version = SemVer.coerce(version)
+
+        if not isinstance(version, SemVer):
 
             if not version:
                 raise ValueError('Version must non-null/positive length')
@@ -70,7 +143,7 @@ class Avakas():
             if self.tag_prefix and version.startswith(self.tag_prefix):
                 version = version[len(self.tag_prefix):]
             try:
-                version = Version(version)
+                version = SemVer.parse(version)
             except ValueError as err:
                 # Doing this to get around the linter, which seems like a
                 # hobgoblin, but couldn't figure out how to get the pylint
@@ -84,14 +157,39 @@ class Avakas():
     @property
     def version_obj(self):
         """
-        Get a copy (not the original) of the `semantic_version.Version object
-        which this instance uses to internally manage its version
+        Get the `avakas.semver.SemVer` which this instance uses to
+        internally manage its version. Versions are immutable, so there
+        is no need for a copy.
 
         Returns:
-            * `semantic_version.Version` : A copy of `self._version`
+            * `avakas.semver.SemVer` : `self._version`
+        """
+
+        return self._version
+
+    @classmethod
+    def version_locator(cls):
+        """
+        The `avakas.patcher` locator of the version in a project file,
+        built from `VERSION_PATTERN` once per flavor
         """
+        return regex_locator(cls.VERSION_PATTERN)
 
-        return copy.deepcopy(self._version)
+    @classmethod
+    def version_files(cls, **kwargs):
+        """
+        Files the version of a project is read from. Used to invalidate
+        cached versions.
+        """
+        # pylint: disable=unused-argument
+        return []
+
+    def cache_values(self):
+        """
+        Values resolved by `read()` which may be cached until the
+        repository changes
+        """
+        return {'version': self.version}
 
     def read(self):
         """Read version data from a project"""
@@ -137,6 +235,17 @@ class Avakas():
 
         return True
 
+    def version_index(self):
+        """
+        The `avakas.tags.VersionIndex` of every version tagged in the
+        repository of the project, or None outside of a git repository
+        """
+        if not find_git_dir(self.directory):
+            return None
+
+        return self.workspace.version_index(self.directory,
+                                            tag_prefix=self.tag_prefix)
+
     def get_next_prerelease_version(
             self, starting_version=None, prefix=None,
             new_version=None):
@@ -146,6 +255,10 @@ class Avakas():
 
         if `starting_version` is not passed in, this will use `self`'s
         version object as the starting version.
+
+        Prereleases of the new version which are already tagged are
+        skipped, i.e. bumping to `rc.2` when `rc.3` is tagged gives
+        `rc.4`.
         """
 
         if starting_version is None:
@@ -154,6 +267,9 @@ class Avakas():
         if new_version is None:
             new_version = self._version
 
+        starting_version = SemVer.coerce(starting_version)
+        new_version = SemVer.coerce(new_version)
+
         # This \/ checks whether last version was a pre-release, and then
         # whether the beginning (at minimum) of the current pre-release
         # prefix (PRP) matches the intended PRP. This could resolve to
@@ -194,6 +310,15 @@ class Avakas():
 
         prerelease_version += 1
 
+        versions = self.version_index()
+        tagged = versions.highest_prerelease(new_version, prefix) \
+            if versions is not None else None
+        if tagged is not None:
+            # a prerelease with nothing after the prefix is an implicit zero
+            tagged = tagged.prerelease[prerelease_len:prerelease_len + 1]
+            prerelease_version = max(prerelease_version,
+                                     int(tagged[0]) + 1 if tagged else 1)
+
         return prerelease_version
 
     def make_prerelease(self, version, prefix=None, build_date=None):
@@ -223,17 +348,18 @@ class Avakas():
 
     def apply_metadata(self, *metadata):
         """Apply build metadata to project version"""
-        self._version.build += metadata
+        self._version = self._version.replace(
+            build=self._version.build + metadata)
 
     def apply_prerelease(self, *prebuild, prefix=None, build_date=None):
         """Apply prebuild data to project version"""
-        if prefix:
-            self._version.prerelease = (prefix,)
-
-        self._version.prerelease += tuple(str(element) for element in prebuild)
+        prerelease = (prefix,) if prefix else self._version.prerelease
+        prerelease += tuple(str(element) for element in prebuild)
 
         if build_date is not None and build_date:
-            self._version.prerelease += (build_date,)
+            prerelease += (build_date,)
+
+        self._version = self._version.replace(prerelease=prerelease)
 
 
 def register_flavor(flavor):
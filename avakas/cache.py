@@ -0,0 +1,107 @@
+"""
+Avakas On-Disk Version Cache
+
+Remembers the resolved version of a project in the git directory,
+keyed by the state of the repository it was resolved from, so that
+repeated `show` invocations against an unchanged checkout can skip
+reading tags and walking history.
+"""
+
+import json
+import os
+import tempfile
+
+from avakas.refs import find_git_dir, resolve_ref, tag_refs_fingerprint, \
+    file_digest
+
+CACHE_FILENAME = 'avakas-cache'
+CACHE_FORMAT = 1
+
+
+class VersionCache():
+    """
+    Cache file stored as `.git/avakas-cache`. Each project (flavor,
+    directory and options) gets an entry which is only valid while the
+    HEAD sha, branch tip, tag refs and version files are unchanged.
+    """
+
+    def __init__(self, git_dir, common):
+        self.git_dir = git_dir
+        self.common = common
+        self.path = os.path.join(git_dir, CACHE_FILENAME)
+
+    @classmethod
+    def for_directory(cls, directory):
+        """Returns the cache for a directory, or None outside of git"""
+        found = find_git_dir(directory)
+        if not found:
+            return None
+
+        return cls(*found)
+
+    @staticmethod
+    def entry_key(project, **kwargs):
+        """The cache entry name for a project flavor and its options"""
+        return json.dumps([project.PROJECT_TYPE,
+                           os.path.abspath(kwargs['directory'][0]),
+                           kwargs.get('tag_prefix') or '',
+                           kwargs.get('branch'),
+                           kwargs.get('filename'),
+                           bool(kwargs.get('path_scoped'))])
+
+    def state(self, project, **kwargs):
+        """
+        Snapshot of everything a cached version depends on
+        """
+        branch = kwargs.get('branch')
+        files = project.version_files(**kwargs)
+        return {
+            'head': resolve_ref(self.git_dir, self.common, 'HEAD'),
+            'branch': resolve_ref(self.git_dir, self.common,
+                                  f"refs/heads/{branch}"),
+            'tags': tag_refs_fingerprint(self.common),
+            'files': [[path, file_digest(path)] for path in sorted(files)]
+        }
+
+    def load(self):
+        """Read all cache entries, discarding an unreadable cache"""
+        try:
+            with open(self.path, 'r', encoding='utf8') as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return {}
+
+        if not isinstance(data, dict) or data.get('format') != CACHE_FORMAT:
+            return {}
+
+        return data.get('entries', {})
+
+    def get(self, key, state):
+        """
+        Returns the cached values for an entry if it was stored against
+        the same state, otherwise None
+        """
+        entry = self.load().get(key)
+        if not entry or entry.get('state') != state:
+            return None
+
+        return entry.get('values')
+
+    def put(self, key, state, values):
+        """Store values for an entry, replacing any stale data"""
+        entries = self.load()
+        entries[key] = {'state': state, 'values': values}
+        data = {'format': CACHE_FORMAT, 'entries': entries}
+        try:
+            handle, tmp_path = tempfile.mkstemp(dir=self.git_dir,
+                                                prefix=CACHE_FILENAME)
+        except OSError:
+            # the cache is an optimization, a read-only .git is fine
+            return
+
+        try:
+            with os.fdopen(handle, 'w', encoding='utf8') as tmp_file:
+                json.dump(data, tmp_file)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            os.unlink(tmp_path)
@@ -11,81 +11,240 @@ from __future__ import print_function
 import os
 import sys
 import argparse
-
-from git import Repo
-
-from .avakas import detect_project_flavor, Avakas
-from .errors import AvakasError
+import json
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from .avakas import detect_project_flavor, detect_flavor_class, Avakas
+from .cache import VersionCache
+from .errors import AvakasError, error_message
+from .hints import DEFAULT_HINTS, HINT_STYLES
+from .refs import find_git_dir, resolve_ref
+from .semver import VersionSpec
+from .timings import TIMINGS, timed
 from .utils import my_version
+from .workspace import Workspace
 
 
 def get_repo(directory):
     """Load the git repository."""
+    # pylint: disable=import-outside-toplevel
+    from git import Repo
     return Repo(directory, search_parent_directories=True)
 
 
-def git_rev(directory):
+def git_rev(directory, workspace=None):
     """Returns the first eight characters of HEAD"""
+    if workspace:
+        return str(workspace.repo(directory).head.commit)[0:8]
+
     return str(get_repo(directory).head.commit)[0:8]
 
 
-def add_metadata(project, buildmeta=False, **kwargs):
+def add_metadata(project, buildmeta=False, environ=None, **kwargs):
     """
     Add metadata for set/bump actions
     """
     directory = kwargs['directory'][0]
 
-    git_str = str(git_rev(directory))
     if buildmeta:
+        git_str = str(git_rev(directory, project.workspace))
         metadata = (git_str,)
-        metadata += ci_build_meta()
+        metadata += ci_build_meta(environ)
         project.apply_metadata(*metadata)
 
     return project
 
 
-def ci_build_meta():
-    """Return any CI system specific build metadata"""
+def ci_build_meta(environ=None):
+    """
+    Return any CI system specific build metadata, from the environment of
+    this process unless another (i.e. that of a server client) is given
+    """
+    environ = os.environ if environ is None else environ
     meta = ()
-    if 'BUILD_NUMBER' in os.environ:
-        meta = (os.environ['BUILD_NUMBER'],)
-    elif 'TRAVIS_BUILD_NUMBER' in os.environ:
-        meta = (os.environ['TRAVIS_BUILD_NUMBER'],)
-    elif 'CIRCLE_BUILD_NUM' in os.environ:
-        meta = (os.environ['CIRCLE_BUILD_NUM'],)
-    elif ('GITHUB_RUN_ID' in os.environ) and \
-         ('GITHUB_RUN_NUMBER' in os.environ):
-        meta = (os.environ['GITHUB_RUN_ID'], os.environ['GITHUB_RUN_NUMBER'],)
+    if 'BUILD_NUMBER' in environ:
+        meta = (environ['BUILD_NUMBER'],)
+    elif 'TRAVIS_BUILD_NUMBER' in environ:
+        meta = (environ['TRAVIS_BUILD_NUMBER'],)
+    elif 'CIRCLE_BUILD_NUM' in environ:
+        meta = (environ['CIRCLE_BUILD_NUM'],)
+    elif ('GITHUB_RUN_ID' in environ) and \
+         ('GITHUB_RUN_NUMBER' in environ):
+        meta = (environ['GITHUB_RUN_ID'], environ['GITHUB_RUN_NUMBER'],)
     return meta
 
 
-def cli_show_version(**kwargs):
+def at_revisions(revs, stdin=None):
+    """Revisions given to `show --at`, those from stdin in place of `-`"""
+    found = []
+    for rev in revs:
+        if rev != '-':
+            found.append(rev)
+            continue
+
+        for line in stdin or sys.stdin:
+            line = line.strip()
+            if line:
+                found.append(line)
+
+    return found
+
+
+def cli_show_at(revs, tag_prefix='', **kwargs):
+    """
+    Show the nearest version tagged on or before each of many commits,
+    with one tag index and one pass over their history. Emits one JSON
+    object per revision, in the order they were given.
+    """
+    # pylint: disable=import-outside-toplevel
+    from .ancestry import nearest_versions, resolve_commits
+
+    directory = kwargs['directory'][0]
+    revs = at_revisions(revs)
+    with timed('resolve'):
+        shas = resolve_commits(directory, revs)
+    # the server's workspace, when there is one, keeps the tags warm
+    workspace = kwargs.get('workspace') or Workspace()
+    index = workspace.tag_index(directory, tag_prefix=tag_prefix)
+    with timed('history'):
+        nearest = nearest_versions(directory, [sha for sha in shas if sha],
+                                   index)
+
+    unknown = []
+    for rev, sha in zip(revs, shas):
+        result = {'commit': rev}
+        if sha is None:
+            unknown.append(rev)
+            result['error'] = f"Unknown commit {rev}"
+        else:
+            found = nearest[sha]
+            result.update({'sha': sha,
+                           'version': f"{tag_prefix}{found[1]}"
+                           if found else None,
+                           'distance': found[0] if found else None})
+        print(json.dumps(result))
+
+    if unknown:
+        raise AvakasError(f"Unable to resolve {', '.join(unknown)}")
+
+
+def cli_show_version(no_cache=False, at=None, **kwargs):
     """Show the current flavour specific version for a project."""
-    project = detect_project_flavor(**kwargs)
-    if not project.read():
-        raise AvakasError('Unable to extract current version')
+    if at:
+        cli_show_at(at, **kwargs)
+        return
+
+    with timed('detect'):
+        flavor = detect_flavor_class(**kwargs)
+    cache = None
+    if not no_cache:
+        cache = VersionCache.for_directory(kwargs['directory'][0])
+
+    if cache:
+        with timed('cache'):
+            key = cache.entry_key(flavor, **kwargs)
+            cached = cache.get(key, cache.state(flavor, **kwargs))
+        if cached:
+            print(cached['version'])
+            return
+
+    project = flavor(**kwargs)
+    with timed('read'):
+        if not project.read():
+            raise AvakasError('Unable to extract current version')
+
+    if cache:
+        with timed('cache'):
+            cache.put(key, cache.state(flavor, **kwargs),
+                      project.cache_values())
 
     print(str(project.version))
 
 
-def cli_bump_version(
+def cli_query(spec, latest=False, tag_prefix='', **kwargs):
+    """
+    Show the tagged versions within a version spec, lowest first, or
+    only the highest of them with `latest`
+    """
+    try:
+        spec = VersionSpec(spec)
+    except ValueError as err:
+        raise AvakasError(str(err)) from err
+
+    directory = kwargs['directory'][0]
+    # the server's workspace, when there is one, keeps the tags warm
+    workspace = kwargs.get('workspace') or Workspace()
+    versions = workspace.version_index(directory, tag_prefix=tag_prefix)
+    with timed('query'):
+        matched = versions.select(spec)
+    if not matched:
+        raise AvakasError(f"No version matches {spec}")
+
+    for version in matched[-1:] if latest else matched:
+        print(f"{tag_prefix}{version}")
+
+
+def read_project(**kwargs):
+    """Detect the flavour of a project and read its current version."""
+    with timed('detect'):
+        project = detect_project_flavor(**kwargs)
+    with timed('read'):
+        if not project.read():
+            raise AvakasError('Unable to extract current version')
+
+    return project
+
+
+def bump_project(
+        project,
         level=None,
         prerelease=False,
         prerelease_date=False, **kwargs):
-    """Bump the flavour specific version for a project."""
-    project = detect_project_flavor(**kwargs)
-    if not project.read():
-        raise AvakasError('Unable to extract current version')
+    """
+    Bump and write the flavour specific version for a project which has
+    been read.
+
+    Returns:
+        * (`str` previous version, `bool` whether it was bumped)
+    """
     old_version = project.version
 
-    if not project.bump(
+    with timed('bump'):
+        bumped = project.bump(
             bump=level[0],
             prerelease=prerelease,
             prerelease_prefix=kwargs['prerelease_prefix'],
-            build_date=prerelease_date):
-        sys.exit(0)
+            build_date=prerelease_date)
+    if not bumped:
+        return old_version, False
     project = add_metadata(project, **kwargs)
-    project.write()
+    if not kwargs.get('dry') and already_tagged(project):
+        # i.e. another project of a batch in the same repository got there
+        # first, refuse before committing anything
+        raise AvakasError(f"Version {project.version} is already tagged")
+    with timed('write'):
+        project.write()
+
+    return old_version, True
+
+
+def already_tagged(project):
+    """Whether the version of a project is already a tag in its repository"""
+    found = find_git_dir(project.directory)
+    if not found:
+        return False
+
+    return resolve_ref(found[0], found[1],
+                       f"refs/tags/{project.version}") is not None
+
+
+def cli_bump_version(**kwargs):
+    """Bump the flavour specific version for a project."""
+    project = read_project(**kwargs)
+    old_version, bumped = bump_project(project, **kwargs)
+    if not bumped:
+        sys.exit(0)
 
     print(f"Version updated from {old_version} to {str(project.version)}")
 
@@ -97,7 +256,8 @@ def cli_set_version(prerelease=False,
     """Manually set the flavour specific version for a project."""
 
     version = kwargs['version'][0]
-    project = detect_project_flavor(**kwargs)
+    with timed('detect'):
+        project = detect_project_flavor(**kwargs)
     original_version = project.version_obj
 
     project.version = version
@@ -109,46 +269,328 @@ def cli_set_version(prerelease=False,
         )
         project.make_prerelease(prerelease_version, build_date=prerelease_date)
     project = add_metadata(project, **kwargs)
-    project.write()
+    if not kwargs.get('dry') and already_tagged(project):
+        # i.e. another project of a batch in the same repository got there
+        # first, refuse before committing anything
+        raise AvakasError(f"Version {project.version} is already tagged")
+    with timed('write'):
+        project.write()
 
     print(f"Version set to {project.version}")
 
 
+@contextmanager
+def instrumentation(timings=False, profile=None, **_kwargs):
+    """
+    Record phase timings for the enclosed run when asked to, printing
+    them to stderr for `--timings`. `--profile` writes the timings to a
+    `.json` file, or a cProfile dump (for `pstats`) to any other file.
+    """
+    if not timings and not profile:
+        yield
+        return
+
+    TIMINGS.reset()
+    TIMINGS.enabled = True
+    profiler = None
+    if profile and not profile.endswith('.json'):
+        # pylint: disable=import-outside-toplevel
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    try:
+        with timed('total'):
+            yield
+    finally:
+        TIMINGS.enabled = False
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(profile)
+        elif profile:
+            TIMINGS.write_json(profile)
+
+        if timings:
+            TIMINGS.print_report()
+
+
+CLI_OPERATIONS = {
+    'bump': cli_bump_version,
+    'show': cli_show_version,
+    'set': cli_set_version,
+    'query': cli_query,
+}
+
+
+def run_operation(operation=None, **kwargs):
+    """
+    Run a show, bump or set operation, reporting problems to stderr.
+    Used for the command line and for every request to the server.
+
+    Returns:
+        * `int` exit status
+    """
+    try:
+        directory = kwargs['directory'][0]
+        if not os.path.exists(directory):
+            raise AvakasError(f"Directory {directory} does not exist.")
+
+        with instrumentation(**kwargs):
+            CLI_OPERATIONS[operation](operation=operation, **kwargs)
+    except AvakasError as err:
+        print(f"Problem: {err.message}", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+def cli_client(socket_path, **kwargs):
+    """Have the avakas server listening on `socket_path` run an operation"""
+    # pylint: disable=import-outside-toplevel
+    from .server import send_request
+
+    kwargs['directory'] = [os.path.abspath(kwargs['directory'][0])]
+    if kwargs.get('at'):
+        # the server has no stdin of ours to read revisions from
+        kwargs['at'] = at_revisions(kwargs['at'])
+    if kwargs.get('profile'):
+        kwargs['profile'] = os.path.abspath(kwargs['profile'])
+
+    response = send_request(socket_path, kwargs, dict(os.environ))
+    sys.stdout.write(response.get('stdout', ''))
+    sys.stderr.write(response.get('stderr', ''))
+    return response.get('status', 1)
+
+
+def cli_serve(socket_path, **_kwargs):
+    """
+    Answer show, bump and set requests on a Unix socket until
+    interrupted or terminated
+    """
+    # pylint: disable=import-outside-toplevel
+    import signal
+    from .server import AvakasServer, claim_socket
+
+    claim_socket(socket_path)
+    server = AvakasServer(socket_path,
+                          {name: run_operation for name in CLI_OPERATIONS})
+    signal.signal(signal.SIGTERM, lambda *_args: sys.exit(0))
+    print(f"Serving on {socket_path}", file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(socket_path)
+
+
+def batch_directories(directories=None, manifest=None):
+    """
+    Project directories given on the command line, followed by those
+    listed in a manifest file (one per line, `#` comments allowed)
+    """
+    found = list(directories or [])
+    if manifest:
+        with open(manifest, 'r', encoding='utf8') as manifest_file:
+            for line in manifest_file:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    found.append(line)
+
+    return found
+
+
+def batch_read(directory, **kwargs):
+    """Detect and read one project of a batch, run on the thread pool"""
+    if not os.path.exists(directory):
+        raise AvakasError(f"Directory {directory} does not exist.")
+
+    return read_project(directory=[directory], **kwargs)
+
+
+def batch_show(project, **_kwargs):
+    """Show the version of one project of a batch"""
+    return {'flavor': project.PROJECT_TYPE, 'version': str(project.version)}
+
+
+def batch_bump(project, **kwargs):
+    """Bump the version of one project of a batch"""
+    old_version, bumped = bump_project(project, **kwargs)
+    return {'flavor': project.PROJECT_TYPE,
+            'previous': str(old_version),
+            'version': str(project.version),
+            'bumped': bumped}
+
+
+def cli_batch(batch_operation=None, directories=None, manifest=None,
+              jobs=1, **kwargs):
+    """
+    Show or bump many projects in one process, sharing git state between
+    them. Flavor detection and reading is spread over `jobs` threads,
+    while bumps are applied one at a time. Emits one JSON object per
+    project, in the order the projects were given. Any error is
+    reported for its project without stopping the others.
+    """
+    if jobs < 1:
+        raise AvakasError('At least one job is required')
+
+    operation = {'show': batch_show, 'bump': batch_bump}[batch_operation]
+    workspace = Workspace()
+    failed = False
+    directories = batch_directories(directories, manifest)
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        reads = [executor.submit(batch_read, directory,
+                                 workspace=workspace, **kwargs)
+                 for directory in directories]
+        for directory, read in zip(directories, reads):
+            result = {'directory': directory}
+            try:
+                result.update(operation(read.result(),
+                                        directory=[directory],
+                                        **kwargs))
+            except Exception as err:  # pylint: disable=broad-except
+                failed = True
+                result['error'] = error_message(err)
+
+            print(json.dumps(result), flush=True)
+
+    if failed:
+        sys.exit(1)
+
+
+def multi_bump(project, **kwargs):
+    """Read and bump one repository of a multi bump, run on the thread pool"""
+    with timed('read'):
+        if not project.read():
+            raise AvakasError('Unable to extract current version')
+
+    return batch_bump(project, **kwargs)
+
+
+def cli_multi_bump(multi=None, concurrency=8, **kwargs):
+    """
+    Bump every repository listed in the `multi` file concurrently, with
+    pushes deferred and run as asynchronous git processes. Emits one JSON
+    object per repository, in the order they were listed.
+    """
+    # pylint: disable=import-outside-toplevel
+    import asyncio
+    from .multi import bump_repositories
+
+    def report(result):
+        print(json.dumps(result), flush=True)
+
+    directories = batch_directories(manifest=multi)
+    succeeded = asyncio.run(bump_repositories(directories, multi_bump, report,
+                                              concurrency=concurrency,
+                                              **kwargs))
+    if not succeeded:
+        sys.exit(1)
+
+
+def gen_query_arg_parser(subparsers, options):
+    """Generate parser for the query operation."""
+    query_p = subparsers.add_parser('query',
+                                    parents=[options],
+                                    help='show tagged versions within a '
+                                    'version spec')
+    query_p.add_argument('spec',
+                         help='Comma separated version clauses, i.e. '
+                         '">=1.2,<2" or "^1.2"')
+    # a list, like the directory of the other operations
+    query_p.add_argument('directory', nargs='?',
+                         type=lambda directory: [directory],
+                         help='Directory of the project', default=os.getcwd())
+    query_p.add_argument('--latest', dest='latest',
+                         help='Only show the highest matching version',
+                         action='store_true',
+                         default=False)
+
+
+def gen_batch_arg_parser(subparsers, options, writable, bump_levels):
+    """Generate parser for the batch operations."""
+
+    batch_p = subparsers.add_parser('batch',
+                                    help='show or bump many projects at once')
+    batch_ops = batch_p.add_subparsers(dest='batch_operation')
+    show_p = batch_ops.add_parser('show',
+                                  parents=[options],
+                                  help='show project versions')
+    bump_p = batch_ops.add_parser('bump',
+                                  parents=[options, writable],
+                                  help='bump project versions')
+    bump_p.add_argument('level', nargs=1, choices=bump_levels,
+                        help='Level to bump at', default='auto')
+    bump_p.add_argument('--default-bump', dest='default_bump',
+                        choices=bump_levels, help='Level to bump at',
+                        default=None)
+    for operation_p in [show_p, bump_p]:
+        operation_p.add_argument('directories', nargs='*',
+                                 help='Directories of the projects')
+        operation_p.add_argument('--manifest', dest='manifest',
+                                 help='File listing project directories, '
+                                 'one per line',
+                                 default=None)
+        operation_p.add_argument('--jobs', dest='jobs', type=int,
+                                 help='Number of projects to detect and '
+                                 'read concurrently',
+                                 default=1)
+
+
 def gen_arg_parser():
     """Generate parser for command line arguments."""
 
     argparse.ArgumentParser(prog="avakas")
     bump_levels = ['patch', 'minor', 'major', 'auto']
+    fetch_policies = ['always', 'if-stale', 'never']
 
     parser = argparse.ArgumentParser(prog="avakas",
                                      description='Process some integers.')
 
+    parser.add_argument('--socket', dest='socket_path',
+                        help='Have the avakas server listening on this Unix '
+                        'socket run show, bump and set (also AVAKAS_SOCKET)',
+                        default=os.environ.get('AVAKAS_SOCKET'))
+
     subparsers = parser.add_subparsers(dest='operation')
 
-    common = argparse.ArgumentParser(add_help=False)
-    common.add_argument('--tag-prefix', dest='tag_prefix',
-                        help='Prefix for version tag name',
-                        default='')
+    options = argparse.ArgumentParser(add_help=False)
+    options.add_argument('--tag-prefix', dest='tag_prefix',
+                         help='Prefix for version tag name',
+                         default='')
 
-    common.add_argument('--branch', dest='branch',
-                        help='Branch to use when updating git',
-                        default='mainline')
+    options.add_argument('--branch', dest='branch',
+                         help='Branch to use when updating git',
+                         default='mainline')
 
-    common.add_argument('--remote', dest='remote',
-                        help='Git remote',
-                        default='origin')
+    options.add_argument('--remote', dest='remote',
+                         help='Git remote',
+                         default='origin')
 
-    common.add_argument('--filename', dest='filename',
-                        help='File name. Used for fallback versioning.',
-                        default='version')
+    options.add_argument('--filename', dest='filename',
+                         help='File name. Used for fallback versioning.',
+                         default='version')
     flavor_text = 'Automation flavor for the project (%s)'
-    flavors = []
-    for flavor, _class in Avakas.project_flavors.items():
-        flavors.append(flavor)
-
-    common.add_argument('--flavor', dest='flavor',
-                        help=flavor_text % ','.join(flavors),
-                        default='auto')
+    flavors = list(Avakas.project_flavors)
+
+    options.add_argument('--flavor', dest='flavor',
+                         help=flavor_text % ','.join(flavors),
+                         default='auto')
+    options.add_argument('--deepen', dest='deepen',
+                         help='Deepen a shallow clone until it reaches a '
+                         'version tag (git-native flavors)',
+                         action='store_true',
+                         default=False)
+    options.add_argument('--timings', dest='timings',
+                         help='Print the time spent in each phase to stderr',
+                         action='store_true',
+                         default=False)
+    options.add_argument('--profile', dest='profile',
+                         help='Write phase timings (to a .json file) or a '
+                         'cProfile dump (to any other file)',
+                         default=None)
+    common = argparse.ArgumentParser(add_help=False, parents=[options])
     common.add_argument('directory', nargs=1,
                         help='Directory of the project', default=os.getcwd())
 
@@ -167,6 +609,22 @@ def gen_arg_parser():
                           default=True)
     writable.add_argument('--with-hooks', dest='with_hooks',
                           help='Run git hooks', default=False)
+    writable.add_argument('--bump-hints', dest='bump_hints',
+                          help='Comma separated styles of bump hints to '
+                          'look for in commit messages '
+                          f"({','.join(HINT_STYLES)})",
+                          default=DEFAULT_HINTS)
+    writable.add_argument('--path-scoped', dest='path_scoped',
+                          help='Only take bump hints from commits which '
+                          'change the project directory',
+                          action='store_true',
+                          default=False)
+    writable.add_argument('--fetch', dest='fetch',
+                          choices=fetch_policies,
+                          help='When to pull the branch before writing. '
+                          'if-stale only pulls when the remote branch has '
+                          'commits which are not local',
+                          default='if-stale')
     writable.add_argument('--dry-run',
                           dest='dry',
                           help='Will not push to git',
@@ -195,17 +653,45 @@ def gen_arg_parser():
                        help='Desired version to set')
 
     bump_p = subparsers.add_parser('bump',
-                                   parents=[common, writable],
+                                   parents=[options, writable],
                                    help='bump version')
+    bump_p.add_argument('directory', nargs='?',
+                        help='Directory of the project', default=None)
     bump_p.add_argument('level', nargs=1, choices=bump_levels,
                         help='Level to bump at', default='auto')
     bump_p.add_argument('--default-bump', dest='default_bump',
                         choices=bump_levels, help='Level to bump at',
                         default=None)
+    bump_p.add_argument('--multi', dest='multi',
+                        help='Bump every repository listed in this file '
+                        '(one per line) concurrently, instead of a directory',
+                        default=None)
+    bump_p.add_argument('--concurrency', dest='concurrency', type=int,
+                        help='Number of repositories to bump at once with '
+                        '--multi',
+                        default=8)
+
+    show_p = subparsers.add_parser('show',
+                                   parents=[common],
+                                   help='show current project version')
+    show_p.add_argument('--no-cache', dest='no_cache',
+                        help='Do not use or update the version cache',
+                        action='store_true',
+                        default=False)
+    show_p.add_argument('--at', dest='at', metavar='REV',
+                        action='append',
+                        help='Show the nearest version tagged on or before '
+                        'a commit instead, as JSON. May be repeated, - '
+                        'reads commits from stdin, one per line',
+                        default=None)
 
-    subparsers.add_parser('show',
-                          parents=[common],
-                          help='show current project version')
+    gen_query_arg_parser(subparsers, options)
+    gen_batch_arg_parser(subparsers, options, writable, bump_levels)
+
+    serve_p = subparsers.add_parser('serve',
+                                    help='answer requests on a Unix socket')
+    serve_p.add_argument('socket_path', metavar='socket',
+                         help='Path of the Unix socket to listen on')
 
     subparsers.add_parser('version')
     subparsers.add_parser('help')
@@ -213,6 +699,31 @@ def gen_arg_parser():
     return parser
 
 
+def bump_arguments(parser, args):
+    """
+    Bump takes either a directory, or a file listing repositories with
+    `--multi`, in which case the repositories are bumped straight away
+    """
+    if args.operation != 'bump':
+        return
+
+    if not args.multi:
+        if args.directory is None:
+            parser.error('a directory or --multi is required')
+        args.directory = [args.directory]
+        return
+
+    if args.directory is not None:
+        parser.error('--multi does not take a directory')
+    try:
+        with instrumentation(**vars(args)):
+            cli_multi_bump(**vars(args))
+    except AvakasError as err:
+        print(f"Problem: {err.message}", file=sys.stderr)
+        sys.exit(1)
+    sys.exit(0)
+
+
 def main():
     """Dat entrypoint"""
     parser = gen_arg_parser()
@@ -228,24 +739,41 @@ def main():
     elif args.operation == 'help':
         parser.print_help()
         sys.exit(0)
+    elif args.operation == 'batch':
+        if args.batch_operation is None:
+            parser.print_help()
+            sys.exit(1)
+        try:
+            with instrumentation(**vars(args)):
+                cli_batch(**vars(args))
+        except AvakasError as err:
+            print(f"Problem: {err.message}", file=sys.stderr)
+            sys.exit(1)
+        sys.exit(0)
+
+    elif args.operation == 'serve':
+        try:
+            cli_serve(**vars(args))
+        except AvakasError as err:
+            print(f"Problem: {err.message}", file=sys.stderr)
+            sys.exit(1)
+        sys.exit(0)
+    elif args.operation not in CLI_OPERATIONS:
+        parser.print_help()
+        sys.exit(1)
+
+    bump_arguments(parser, args)
 
     directory = os.path.abspath(args.directory[0])
 
     if not os.path.exists(directory):
         raise AvakasError(f"Directory {directory} does not exist.")
 
-    try:
-        if args.operation == 'bump':
-            cli_bump_version(**vars(args))
-        elif args.operation == 'show':
-            cli_show_version(**vars(args))
-        elif args.operation == 'set':
-            cli_set_version(**vars(args))
-        else:
-            parser.print_help()
+    if args.socket_path:
+        try:
+            sys.exit(cli_client(**vars(args)))
+        except AvakasError as err:
+            print(f"Problem: {err.message}", file=sys.stderr)
             sys.exit(1)
-    except AvakasError as err:
-        print(f"Problem: {err.message}", file=sys.stderr)
-        sys.exit(1)
 
-    sys.exit(0)
+    sys.exit(run_operation(**vars(args)))
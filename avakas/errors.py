@@ -10,3 +10,16 @@ class AvakasError(Exception):
     def __init__(self, message):
         self.message = message
         super().__init__()
+
+
+def error_message(err):
+    """
+    The message to report for an error, which need not be an
+    `AvakasError` (i.e. one from GitPython or the filesystem)
+    """
+    if isinstance(err, AvakasError):
+        return err.message
+
+    detail = str(err).strip()
+    return f"{type(err).__name__}: {detail}" if detail \
+        else type(err).__name__
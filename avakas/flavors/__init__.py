@@ -2,18 +2,23 @@
 Avakas Built-In Project Flavors
 """
 
-from avakas.flavors.base import AvakasLegacy
-from avakas.flavors.ansible import AvakasAnsibleProject
-from avakas.flavors.chef import AvakasChefProject
-from avakas.flavors.erlang import AvakasErlangProject
-from avakas.flavors.git import AvakasGitNative
-from avakas.flavors.node import AvakasNodeProject
+import importlib
 
-__all__ = [
-    'AvakasAnsibleProject',
-    'AvakasChefProject',
-    'AvakasErlangProject',
-    'AvakasGitNative',
-    'AvakasLegacy',
-    'AvakasNodeProject',
-]
+# flavor modules are imported when their class is first used
+FLAVOR_MODULES = {
+    'AvakasAnsibleProject': 'avakas.flavors.ansible',
+    'AvakasChefProject': 'avakas.flavors.chef',
+    'AvakasErlangProject': 'avakas.flavors.erlang',
+    'AvakasGitNative': 'avakas.flavors.git',
+    'AvakasLegacy': 'avakas.flavors.base',
+    'AvakasNodeProject': 'avakas.flavors.node',
+}
+
+__all__ = sorted(FLAVOR_MODULES)
+
+
+def __getattr__(name):
+    if name in FLAVOR_MODULES:
+        return getattr(importlib.import_module(FLAVOR_MODULES[name]), name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,15 +3,20 @@ Avakas Built-In Base Project Flavor
 """
 
 import os
-import re
 import sys
-
-from git import Repo
+from contextlib import closing
 
 from avakas.errors import AvakasError
 from avakas.avakas import Avakas, register_flavor
+from avakas.hints import MAJOR, bump_hints, max_bump
+from avakas.history import iter_log, scope_paths
+from avakas.patcher import write_atomic
+from avakas.timings import timed
 from avakas.utils import stdout_redirect
 
+# git.PushInfo ERROR | REMOTE_FAILURE | REMOTE_REJECTED | REJECTED
+PUSH_FAILED = 1024 | 32 | 16 | 8
+
 
 @register_flavor('legacy')
 class AvakasLegacy(Avakas):
@@ -31,6 +36,11 @@ class AvakasLegacy(Avakas):
         # For legacy, this should _ALWAYS_ return False
         return False
 
+    @classmethod
+    def version_files(cls, **kwargs):
+        directory = kwargs['directory'][0]
+        return [os.path.join(directory, kwargs['filename'])]
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.repo = None
@@ -40,10 +50,7 @@ class AvakasLegacy(Avakas):
     def __load_git(self):
         """Initializes our local git workspace."""
         opt = self.options
-        repo = Repo(self.directory, search_parent_directories=True)
-        if not repo:
-            raise AvakasError(f"Unable to find associated \
-            git repo for {self.directory}.")
+        repo = self.workspace.repo(self.directory)
 
         if opt['branch'] not in repo.heads:
             raise AvakasError(f"Branch {opt['branch']} branch not found.")
@@ -55,37 +62,91 @@ class AvakasLegacy(Avakas):
         if opt['remote'] not in [r.name for r in repo.remotes]:
             raise AvakasError(f"Remote {opt['remote']} not found")
 
+        self.__pull(repo)
+        return repo
+
+    def __remote_is_newer(self, repo):
+        """
+        Whether the remote branch has commits which the local branch
+        does not, checked with a single ls-remote rather than a fetch
+        """
+        # pylint: disable=import-outside-toplevel
+        from git.exc import GitCommandError
+
+        opt = self.options
+        with timed('git ls-remote'):
+            listing = repo.git.ls_remote(opt['remote'],
+                                         f"refs/heads/{opt['branch']}")
+        if not listing:
+            # leave pull to complain about a missing branch
+            return True
+
+        remote_sha = listing.split()[0]
+        try:
+            return not repo.is_ancestor(remote_sha,
+                                        repo.heads[opt['branch']].commit)
+        except GitCommandError:
+            # we do not even have the commit
+            return True
+
+    def __pull(self, repo):
+        """
+        Pull the branch from the remote according to the fetch policy,
+        never more than once per run
+        """
+        opt = self.options
+        policy = opt.get('fetch') or 'if-stale'
+        if policy == 'never':
+            return
+
+        if not self.workspace.first_fetch(self.directory, opt['remote'],
+                                          opt['branch']):
+            return
+
+        if policy == 'if-stale' and not self.__remote_is_newer(repo):
+            return
+
         # we really do not want to be polluting our stdout when
         # showing the version
-        with stdout_redirect():
+        with stdout_redirect(), timed('git pull'):
             repo.remotes[opt['remote']].pull(refspec=opt['branch'])
 
-        return repo
-
-    def __git_push(self, tag=None):
-        """Push git commit or tag to remote"""
+    def __git_push(self, refspecs):
+        """
+        Push the version commit and tag to the remote in a single
+        atomic push, so either every ref is updated or none are
+        """
         opt = self.options
-        if tag:
-            resp = self.repo.remotes[opt['remote']].push(tag)
+        with timed('git push'):
+            remote = self.repo.remotes[opt['remote']]
+            resp = remote.push(refspec=refspecs, atomic=True)
+        if not resp:
+            raise AvakasError(f"Unable to push to {opt['remote']}")
 
-        resp = self.repo.remotes[opt['remote']].push()
-        resp = resp[0]
-        if resp.flags & 1024 or resp.flags & 32 or resp.flags & 16:
-            raise AvakasError("Unexpected git error: {resp.summary}")
+        for info in resp:
+            if info.flags & PUSH_FAILED:
+                raise AvakasError(f"Unexpected git error: {info.summary}")
 
     def __commit_files(self):
         """Will commit and push the version file and optionally tags."""
         opt = self.options
 
-        self.repo.index.add(self.commit_files)
         skip_hooks = not opt['with_hooks']
-        self.repo.index.commit(f"Version bumped to {self.version}",
-                               skip_hooks=skip_hooks)
+        with timed('git commit'):
+            # the project may be below the repository, and given relative
+            # to the current directory while git resolves relative paths
+            # against the work tree, so give git absolute paths
+            directory = os.path.abspath(self.directory)
+            self.repo.index.add([os.path.join(directory, name)
+                                 for name in self.commit_files])
+            self.repo.index.commit(f"Version bumped to {self.version}",
+                                   skip_hooks=skip_hooks)
 
     def __create_git_tag(self):
         """Creates a git tag"""
         tag = self.version
-        self.repo.create_tag(tag)
+        with timed('git tag'):
+            self.repo.create_tag(tag)
 
         return tag
 
@@ -93,26 +154,26 @@ class AvakasLegacy(Avakas):
         """Will go through the Git history until the last version bump
         and look for hints that we want to "automatically" bump
         our version"""
+        hints = bump_hints(self.options.get('bump_hints'))
         self.repo = self.__load_git()
         vsn = None
-        reg = re.compile(r'(\#|bump:|\[)(?P<bump>(patch|minor|major))(.*|\])',
-                         re.MULTILINE)
-        for commit in self.repo.iter_commits(self.options['branch']):
-            # we go iterate back to the last time we bumped the version
-            if commit.message.startswith('Version bumped to'):
-                break
-
-            res = reg.search(commit.message)
-            if res:
-                bump = res.group('bump')
-                if not vsn:
-                    vsn = bump
-                elif vsn == 'patch' and bump == 'minor':
-                    vsn = 'minor'
-                elif vsn == 'patch' and bump == 'major':
-                    vsn = 'major'
-                elif vsn == 'minor' and bump == 'major':
-                    vsn = 'major'
+        paths = None
+        if self.options.get('path_scoped'):
+            # other projects are bumped in the same repository
+            paths = scope_paths(self.directory)
+        commits = iter_log(self.repo.working_dir, self.options['branch'],
+                           paths=paths)
+        with closing(commits), timed('history'):
+            for _sha, message in commits:
+                # we go iterate back to the last time we bumped the version
+                if message.startswith('Version bumped to'):
+                    break
+
+                vsn = max_bump(vsn, hints.hint(message))
+                # nothing outranks major, no need to read further
+                if vsn == MAJOR:
+                    break
+
         return vsn
 
     def check_if_dirty(self):
@@ -125,22 +186,27 @@ class AvakasLegacy(Avakas):
         """Write the version file"""
 
         path = os.path.join(self.directory, self.version_filename)
-        with open(path, 'w', encoding='utf8') as version_file:
-            version_file.write(f"{self.version}\n")
-            version_file.close()
+        write_atomic(path, f"{self.version}\n")
 
     def write_git(self):
         """Write data to git"""
-        tag = None
-
-        if not self.options['dry']:
-            if self.version_filename and self.options['commitchanges']:
-                self.__commit_files()
-                self.__git_push()
-
-            if not self._version.build:
-                tag = self.__create_git_tag()
-                self.__git_push(tag=tag)
+        if self.options['dry']:
+            return
+
+        refspecs = []
+        if self.version_filename and self.options['commitchanges']:
+            self.__commit_files()
+            branch = self.options['branch']
+            refspecs.append(f"refs/heads/{branch}:refs/heads/{branch}")
+
+        if not self._version.build:
+            tag = self.__create_git_tag()
+            refspecs.append(f"refs/tags/{tag}:refs/tags/{tag}")
+
+        if refspecs and self.options.get('defer_push'):
+            self.pending_push = (self.options['remote'], refspecs)
+        elif refspecs:
+            self.__git_push(refspecs)
 
     def bump(self,
              bump=None,
@@ -3,12 +3,11 @@ Avakas Built-In Chef Project Flavor
 """
 
 import os
-import re
 
 from avakas.flavors.base import AvakasLegacy
 from avakas.avakas import register_flavor
 from avakas.errors import AvakasError
-from avakas.utils import match_and_rewrite_lines
+from avakas.patcher import find_version, patch_version
 
 
 @register_flavor('chef')
@@ -17,25 +16,25 @@ class AvakasChefProject(AvakasLegacy):
     Chef Cookbook Avakas Project Flavor
     """
     PROJECT_TYPE = 'chef'
+    VERSION_PATTERN = rb'^version.+["\'](?P<vsn>\d+\.\d+\.\d+)["\']'
 
     @classmethod
     def guess_flavor(cls, directory):
         return os.path.exists(f"{directory}/metadata.rb")
 
-    def __read_metadata_file(self):
-        with open(f"{self.directory}/metadata.rb",
-                  'r', encoding='utf8') as handle:
-            data = handle.read()
-            return data, handle
+    @classmethod
+    def version_files(cls, **kwargs):
+        directory = kwargs['directory'][0]
+        return [f"{directory}/metadata.rb"]
 
     def read(self):
         """Extract the version from Chef Cookbook metadata"""
-        data, handle = self.__read_metadata_file()
-        pattern = r'^version.+["\'](?P<vsn>\d+\.\d+\.\d+)["\'].*'
-        matcher = re.compile(pattern, re.MULTILINE)
-        vsn_match = matcher.search(data)
-        handle.close()
-        self.version = str(vsn_match.group('vsn'))
+        version = find_version(f"{self.directory}/metadata.rb",
+                               self.version_locator())
+        if version is None:
+            raise AvakasError('Unable to determine version from metadata.rb')
+
+        self.version = version
         return True
 
     def write(self):
@@ -43,19 +42,11 @@ class AvakasChefProject(AvakasLegacy):
 
         self.check_if_dirty()
 
-        pattern = r'^(version.+["\'])(\d+\.\d+\.\d+)(["\'].*)'
-        data, handle = self.__read_metadata_file()
-        rewritten, updated = match_and_rewrite_lines(pattern, data,
-                                                     str(self.version))
-
-        if not updated:
+        if not patch_version(f"{self.directory}/metadata.rb",
+                             self.version_locator(),
+                             str(self.version)):
             raise AvakasError('Unable to set version on metadata.rb')
 
-        with open(f"{self.directory}/metadata.rb",
-                  'w', encoding='utf8') as handle:
-            handle.write(rewritten)
-            handle.close()
-
         self.write_versionfile()
 
         self.write_git()
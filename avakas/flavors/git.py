@@ -2,26 +2,18 @@
 Avakas Built-In Base Project Flavor
 """
 
-import re
 import os
-
-from git import Repo
-
-import semantic_version
+import sys
 
 from avakas.errors import AvakasError
 from avakas.avakas import Avakas, register_flavor
-
-PATCH = 'patch'
-MAJOR = 'major'
-MINOR = 'minor'
-
-# not gonna convert everything to be an enum just yet -TMJ
-BUMPS = {
-    PATCH: 0,
-    MINOR: 1,
-    MAJOR: 2
-}
+from avakas.hints import bump_hints
+from avakas.history import HistoryWalk, ScopedHistoryWalk, iter_log, \
+    iter_shas, scope_paths
+from avakas.patcher import write_atomic
+from avakas.refs import find_git_dir, has_commit_graph
+from avakas.shallow import deepen_to_tag
+from avakas.timings import timed
 
 
 @register_flavor('git-native')
@@ -41,27 +33,39 @@ class AvakasGitNative(Avakas):
         # pylint: disable=unused-argument
         return False
 
+    @classmethod
+    def version_files(cls, **kwargs):
+        directory = kwargs['directory'][0]
+        # read() rewrites the version file, make sure it is still there
+        return [os.path.join(directory, kwargs['filename'])]
+
     def __init__(self, filename, tag_prefix='v', **kwargs):
         # not sure if setting tag_prefix to ! None is too prescriptive
         super().__init__(**kwargs)
         self.tag_prefix = tag_prefix
         self.version_filename = filename
-        self.repo = self.__load_git()
+        self._tag_index = None
+        self._history = None
 
-    def __load_git(self):
-        """Initializes our local git workspace."""
-        repo = Repo(self.directory, search_parent_directories=True)
-        if not repo:
-            raise AvakasError(f"Unable to find associated git \
-            repo for {self.directory}")
+    @property
+    def repo(self):
+        """
+        The `git.Repo` of the project. Only needed when writing, as
+        tags and history are read without GitPython.
+        """
+        return self.workspace.repo(self.directory)
 
-        return repo
+    @property
+    def tag_index(self):
+        """
+        The `avakas.tags.TagIndex` of version tags for this repository,
+        loaded once and shared between reading and bump detection
+        """
+        if self._tag_index is None:
+            self._tag_index = self.workspace.tag_index(
+                self.directory, tag_prefix=self.tag_prefix)
 
-    def _version_from_tag(self, tag):
-        try:
-            return semantic_version.Version(tag.name[len(self.tag_prefix):])
-        except ValueError:
-            return None
+        return self._tag_index
 
     def __git_push(self, tag):
         """Push git tag if remote exists"""
@@ -69,76 +73,108 @@ class AvakasGitNative(Avakas):
         if opt['remote'] not in [r.name for r in self.repo.remotes]:
             return
 
+        if tag and opt.get('defer_push'):
+            refspec = f"refs/tags/{tag.name}:refs/tags/{tag.name}"
+            self.pending_push = (opt['remote'], [refspec])
+            return
+
         if tag:
             remote = self.repo.remote(name=opt['remote'])
-            resp = remote.push(tag)[0]
+            with timed('git push'):
+                resp = remote.push(tag)[0]
 
         if resp.flags & 1024 or resp.flags & 32 or resp.flags & 16:
             raise AvakasError(f"Unexpected git error: {resp.summary}")
 
     def __create_git_tag(self):
         """Creates a git tag"""
-        return self.repo.create_tag(self.version)
+        with timed('git tag'):
+            tag = self.repo.create_tag(self.version)
+        self.workspace.add_tag(self.directory, tag.name, tag.commit.hexsha)
+        return tag
+
+    def __deepen(self, release=False):
+        """
+        Deepen a shallow clone until the branch reaches a version tag,
+        before any tags are read
+        """
+        opt = self.options
+        with timed('git deepen'):
+            deepened = deepen_to_tag(self.directory, opt['remote'],
+                                     opt['branch'], tag_prefix=self.tag_prefix,
+                                     release=release)
+        if not deepened or not deepened.round_trips:
+            return
+
+        for name, commit in deepened.tags.items():
+            self.workspace.add_tag(self.directory, name, commit)
+        print(f"Deepened shallow clone by {deepened.commits} commits and "
+              f"{len(deepened.tags)} tags, with {deepened.round_trips} "
+              f"round trips receiving {deepened.bytes} bytes",
+              file=sys.stderr)
+
+    @property
+    def history(self):
+        """
+        The `avakas.history.HistoryWalk` over the branch, shared by
+        `read()` and auto bumping so history is only walked once. With
+        a commit-graph, the latest tagged commit is found from commit
+        shas alone, which git walks much faster than it formats
+        messages, though every commit back to the tag is still walked.
+        With `path_scoped`, a project below the top of the repository
+        only takes bump hints from the commits which change it.
+        """
+        if self._history is None:
+            branch = self.options['branch']
+            # auto bumps stream every commit back to the release anyway
+            auto_bump = self.options.get('level') == ['auto']
+            if self.options.get('deepen'):
+                self.__deepen(release=auto_bump)
+
+            hints = bump_hints(self.options.get('bump_hints'))
+            paths = None
+            if self.options.get('path_scoped'):
+                paths = scope_paths(self.directory)
+            if paths:
+                self._history = ScopedHistoryWalk(self.directory, branch,
+                                                  paths, self.tag_index,
+                                                  hints=hints)
+                return self._history
+
+            commits = iter_log(self.directory, branch)
+            shas = None
+            found = find_git_dir(self.directory)
+            if found and has_commit_graph(found[1]) and not auto_bump:
+                shas = iter_shas(self.directory, branch)
+            self._history = HistoryWalk(commits, self.tag_index,
+                                        shas=shas, hints=hints)
+
+        return self._history
 
     def __determine_bump(self, for_prerelease=False):
         """Will go through the Git history until the last version bump
         and look for hints that we want to "automatically" bump
         our version"""
-        self.repo = self.__load_git()
-        vsn = None
-        reg = re.compile(r'(\#|bump:|\[)(?P<bump>(patch|minor|major))(.*|\])',
-                         re.MULTILINE)
-        tagged_commits = {}
-        for tag in self.repo.tags:
-            tagged_commits.setdefault(tag.commit, set()).add(tag)
-
-        # the most recent tag, whether pre-release or no
-        tag_version = None
-        release_version = None
-        bump = None
-        head_commit = self.repo.heads[self.options['branch']].commit
-
-        for commit in self.repo.iter_commits(self.options['branch']):
-            # we go iterate back to the last time we bumped the version
-            if commit in tagged_commits:
-                version_tags = [self._version_from_tag(tag) for tag in
-                                tagged_commits[commit]]
-
-                version_tags = [tag for tag in version_tags if tag is not None]
-
-                release_tags = [tag for tag in version_tags if
-                                not tag.prerelease]
-
-                if any(release_tags):
-                    release_version = max(release_tags)
-                if any(version_tags) and tag_version is None:
-                    tag_version = max(version_tags)
-
-                    if for_prerelease and commit == head_commit:
-                        return bump
-
-            if release_version is not None:
-                break  # break out of for commit iterator
-
-            res = reg.search(commit.message)
-            if res:
-                bump = res.group('bump')
-                if not vsn:
-                    vsn = bump
-                else:
-                    vsn = max((vsn, bump), key=lambda x: BUMPS[x])
-
-            if release_version is not None:
-                break
-
-        return vsn
+        history = self.history
+        history.find_latest()
+        # nothing to do for a prerelease of an already tagged commit
+        if for_prerelease and history.head_tagged:
+            return None
+
+        return history.walk().bump
+
+    def cache_values(self):
+        values = super().cache_values()
+        if self.history.done:
+            values['release'] = self.history.release_commit
+            values['bump'] = self.history.bump
+
+        return values
 
     def write_versionfile(self):
         """Write the version file"""
         path = os.path.join(self.directory, self.version_filename)
-        with open(path, 'w', encoding='utf8') as version_file:
-            version_file.write(f"{self.version}\n")
-            version_file.close()
+        write_atomic(path, f"{self.version}\n")
 
     def write_git(self):
         """Write data to git"""
@@ -174,22 +210,7 @@ class AvakasGitNative(Avakas):
         """
         Get the version from git tag
         """
-        latest_tag = None
-        commit_to_tags = {}
-        for tag in self.repo.tags:
-            commit_to_tags.setdefault(tag.commit, set()).add(tag)
-
-        for commit in self.repo.iter_commits(self.options['branch']):
-            if commit in commit_to_tags:
-                version_tags = [self._version_from_tag(tag) for tag in
-                                commit_to_tags[commit]]
-
-                version_tags = [tag for tag in version_tags if tag is not None]
-                if version_tags:
-                    latest_tag = max(version_tags)
-            if latest_tag is not None:
-                break
-
+        latest_tag = self.history.find_latest()
         if latest_tag is None:
             raise AvakasError("No initial tag found!")
 
@@ -7,6 +7,8 @@ import os
 
 from avakas.flavors.base import AvakasLegacy
 from avakas.avakas import register_flavor
+from avakas.errors import AvakasError
+from avakas.patcher import find_version, json_locator, patch_version
 
 
 @register_flavor('node')
@@ -20,33 +22,28 @@ class AvakasNodeProject(AvakasLegacy):
     def guess_flavor(cls, directory):
         return os.path.exists("{directory}/package.json")
 
-    def __read_package_json(self):
-        manifest = os.path.join(self.directory, 'package.json')
-        with open(manifest, 'r', encoding='utf8') as manifest_file:
-            manifest_json = json.load(manifest_file)
-            manifest_file.close()
-
-            return manifest_json
-
-    def __write_package_json(self, manifest_dict):
-        manifest = os.path.join(self.directory, 'package.json')
-        with open(manifest, 'w', encoding='utf8') as manifest_file:
-            json.dump(manifest_dict,
-                      manifest_file,
-                      indent=4,
-                      separators=(',', ': '),
-                      sort_keys=True)
-            manifest_file.close()
+    @classmethod
+    def version_files(cls, **kwargs):
+        directory = kwargs['directory'][0]
+        return [os.path.join(directory, 'package.json')]
 
     @classmethod
-    def __extract_version(cls, manifest_json):
-        return manifest_json['version']
+    def version_locator(cls):
+        return json_locator('version')
 
     def read(self):
-        manifest = self.__read_package_json()
-        self.version = self.__extract_version(manifest)
+        manifest = os.path.join(self.directory, 'package.json')
+        version = find_version(manifest, self.version_locator())
+        if version is None:
+            raise AvakasError('Unable to determine version from package.json')
+
+        # the raw contents of a JSON string, which may be escaped
+        self.version = json.loads(f'"{version}"')
+        return True
 
     def write(self):
-        manifest = self.__read_package_json()
-        manifest['version'] = self.version
-        self.__write_package_json(manifest)
+        manifest = os.path.join(self.directory, 'package.json')
+        # escaped, as only the contents of the JSON string are replaced
+        version = json.dumps(self.version)[1:-1]
+        if not patch_version(manifest, self.version_locator(), version):
+            raise AvakasError('Unable to set version on package.json')
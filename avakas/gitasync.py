@@ -0,0 +1,61 @@
+"""
+Avakas Asynchronous Git
+
+Runs the git operations which wait on the network, pulling and pushing,
+as asyncio subprocesses so that many repositories can wait at once.
+Everything local is still done through GitPython.
+"""
+
+import asyncio
+import os
+
+from avakas.errors import AvakasError
+from avakas.timings import timed
+
+
+async def run_git(directory, *args):
+    """
+    Run git in `directory`, returning its output. Raises `AvakasError`
+    with the last line git complained with if it fails. Git is never
+    allowed to prompt for credentials, as nobody would answer.
+    """
+    env = dict(os.environ, GIT_TERMINAL_PROMPT='0')
+    process = await asyncio.create_subprocess_exec(
+        'git', *args, cwd=directory, env=env,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE)
+    stdout, stderr = await process.communicate()
+    if process.returncode != 0:
+        lines = stderr.decode('utf8', errors='replace').strip().splitlines()
+        detail = lines[-1] if lines else f"exit status {process.returncode}"
+        raise AvakasError(f"git {args[0]} failed in {directory}: {detail}")
+
+    return stdout.decode('utf8', errors='replace')
+
+
+async def current_branch(directory):
+    """The branch checked out in `directory`, None if HEAD is detached"""
+    try:
+        output = await run_git(directory, 'symbolic-ref', '--quiet',
+                               '--short', 'HEAD')
+    except AvakasError:
+        return None
+
+    return output.strip()
+
+
+async def pull(directory, remote, branch):
+    """Pull a branch from a remote into the checked out branch"""
+    with timed('git pull'):
+        await run_git(directory, 'pull', '--quiet', remote, branch)
+
+
+async def push(directory, remote, refspecs):
+    """
+    Push refspecs to a remote in a single atomic push, so either every
+    ref is updated or none are
+    """
+    with timed('git push'):
+        await run_git(directory, 'push', '--quiet', '--atomic', remote,
+                      *refspecs)
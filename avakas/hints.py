@@ -0,0 +1,100 @@
+"""
+Avakas Bump Hints
+
+Finds the bump level hinted at in commit messages. Hints come in styles,
+sets of patterns for each bump level, and the patterns of every style in
+use are combined into a single regex. Each message is searched once,
+stopping at the first major hint as nothing outranks it.
+"""
+
+import re
+from functools import lru_cache
+
+from avakas.errors import AvakasError
+
+PATCH = 'patch'
+MAJOR = 'major'
+MINOR = 'minor'
+
+# not gonna convert everything to be an enum just yet -TMJ
+BUMPS = {
+    PATCH: 0,
+    MINOR: 1,
+    MAJOR: 2
+}
+
+# optional scope and breaking change marker of a conventional commit type
+CONVENTIONAL_SCOPE = r'(?:\([^)\n]*\))?'
+HINT_STYLES = {
+    # anywhere in a message, i.e. `#minor`, `bump:major` or `[patch]`
+    'avakas': {
+        MAJOR: r'(?:\#|bump:|\[)major',
+        MINOR: r'(?:\#|bump:|\[)minor',
+        PATCH: r'(?:\#|bump:|\[)patch',
+    },
+    # https://www.conventionalcommits.org/ types are case insensitive,
+    # breaking change footers are not
+    'conventional': {
+        MAJOR: r'\A[a-zA-Z]+' + CONVENTIONAL_SCOPE + r'!:'
+               r'|^BREAKING[ -]CHANGE:',
+        MINOR: r'\A(?i:feat)' + CONVENTIONAL_SCOPE + ':',
+        PATCH: r'\A(?i:fix)' + CONVENTIONAL_SCOPE + ':',
+    },
+}
+DEFAULT_HINTS = 'avakas'
+
+
+def max_bump(current, bump):
+    """The higher of two bump levels, either of which may be None"""
+    if current is None:
+        return bump
+    if bump is None:
+        return current
+
+    return max((current, bump), key=lambda x: BUMPS[x])
+
+
+class BumpHints():
+    """
+    Matches the hints of one or more styles, in a single pass over each
+    message. Hints are matched in order of bump level, so the name of
+    the group which matched is the level hinted at.
+    """
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, styles=(DEFAULT_HINTS,)):
+        if not styles:
+            raise AvakasError('No bump hint styles given')
+
+        levels = {MAJOR: [], MINOR: [], PATCH: []}
+        for style in styles:
+            if style not in HINT_STYLES:
+                raise AvakasError(f"Unknown bump hint style {style}")
+            for level, pattern in HINT_STYLES[style].items():
+                levels[level].append(pattern)
+
+        self.styles = tuple(styles)
+        self.pattern = re.compile(
+            '|'.join(f"(?P<{level}>{'|'.join(patterns)})"
+                     for level, patterns in levels.items() if patterns),
+            re.MULTILINE)
+
+    def hint(self, message):
+        """The highest bump level hinted at in a message, if any"""
+        found = None
+        for match in self.pattern.finditer(message):
+            found = max_bump(found, match.lastgroup)
+            if found == MAJOR:
+                break
+
+        return found
+
+
+@lru_cache(maxsize=None)
+def bump_hints(styles=None):
+    """
+    The `BumpHints` for a comma separated list of styles, built once per
+    process. Raises `AvakasError` for an unknown style.
+    """
+    names = [name.strip() for name in (styles or DEFAULT_HINTS).split(',')]
+    return BumpHints([name for name in names if name])
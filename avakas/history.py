@@ -0,0 +1,352 @@
+"""
+Avakas Git History Walking
+"""
+
+import os
+import subprocess
+from contextlib import closing
+
+from avakas.errors import AvakasError
+from avakas.hints import MAJOR, bump_hints, max_bump
+from avakas.timings import timed
+
+# one NUL terminated sha and raw message per commit
+LOG_FORMAT = '%H%x00%B%x00'
+LOG_READ_SIZE = 64 * 1024
+# messages are truncated beyond this, bounding memory use per record
+LOG_MAX_MESSAGE = 1024 * 1024
+
+
+def _log_fields(stream):
+    """
+    Split a stream of NUL terminated fields, reading in fixed size
+    chunks. Fields longer than `LOG_MAX_MESSAGE` are truncated so the
+    buffer never grows past one chunk plus one message.
+    """
+    buf = bytearray()
+    truncated = False
+    while True:
+        chunk = stream.read(LOG_READ_SIZE)
+        if not chunk:
+            return
+
+        start = 0
+        end = chunk.find(b'\0')
+        while end != -1:
+            if not truncated:
+                buf += chunk[start:end]
+            yield bytes(buf)
+            buf.clear()
+            truncated = False
+            start = end + 1
+            end = chunk.find(b'\0', start)
+
+        if not truncated:
+            buf += chunk[start:]
+            if len(buf) > LOG_MAX_MESSAGE:
+                del buf[LOG_MAX_MESSAGE:]
+                truncated = True
+
+
+def _log_records(stream):
+    """(`str` sha, `str` message) for each record of `LOG_FORMAT`"""
+    fields = _log_fields(stream)
+    for sha in fields:
+        message = next(fields, b'')
+        # records are newline separated
+        yield sha.strip().decode('ascii'), \
+            message.decode('utf8', errors='replace')
+
+
+def _log_shas(stream):
+    """The `str` sha on each line"""
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield line.decode('ascii')
+
+
+def _stream_log(directory, rev, args, parse, paths=None):
+    """
+    Run `git log` over `rev`, yielding whatever `parse` makes of its
+    output. Closing the generator (or abandoning it) stops the process.
+    With `paths`, only commits changing them are logged. Paths are
+    taken literally, as git only uses changed-path Bloom filters for
+    pathspecs without wildcards.
+    """
+    # pylint: disable=consider-using-with
+    proc = subprocess.Popen(['git', '--literal-pathspecs', 'log'] + args +
+                            [rev, '--'] + list(paths or []),
+                            cwd=directory,
+                            stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL)
+    finished = False
+    try:
+        yield from parse(proc.stdout)
+        finished = True
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        proc.wait()
+
+    if finished and proc.returncode != 0:
+        raise AvakasError(f"Unable to read git history of {rev}")
+
+
+def iter_log(directory, rev, paths=None):
+    """
+    Yields (`str` sha, `str` message) for each commit reachable from
+    `rev`, newest first, streamed from a single `git log` process.
+    Closing the generator (or abandoning it) stops the process, so
+    walks which end early never read the rest of the history. With
+    `paths`, only commits changing them are yielded.
+    """
+    return _stream_log(directory, rev, [f"--format={LOG_FORMAT}"],
+                       _log_records, paths=paths)
+
+
+def iter_shas(directory, rev):
+    """
+    Yields the `str` sha of each commit reachable from `rev`, in the
+    same order as `iter_log`, for finding tagged commits. Without
+    messages to format, git reads commits from the commit-graph file
+    when there is one rather than loading each commit object.
+
+    The walk is the plain `git log` walk, and still goes through every
+    commit up to the tag. Simplifying history (i.e. by decoration)
+    limits the walk, and `git describe` goes by the number of commits,
+    both of which can find a different latest tag across merges.
+    """
+    return _stream_log(directory, rev, ['--format=%H'], _log_shas)
+
+
+def scope_paths(directory):
+    """
+    The paths to limit the history of the project in `directory` to,
+    or None when it is the top of its work tree and owns every commit
+    """
+    if os.path.exists(os.path.join(directory, '.git')):
+        return None
+
+    return [os.path.abspath(directory)]
+
+
+class HistoryWalk():
+    """
+    Walks the history of a branch, newest first, exactly once. The
+    walk finds the latest version tag, then carries on collecting bump
+    hints until it reaches the commit of the last release. It only
+    advances as far as the questions asked of it require, so showing
+    a version stops at the latest tag while bumping continues from
+    there to the last release.
+
+    `commits` is an iterable of (`str` sha, `str` message) tuples.
+    `shas`, if given, is an iterable of the `str` shas of the same
+    commits in the same order, which finds the latest version without
+    formatting the message of every commit before it. `hints` is the
+    `avakas.hints.BumpHints` to look for, messages are no longer
+    searched once a major bump is hinted at.
+    """
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, commits, tag_index, shas=None, hints=None):
+        self._commits = iter(commits)
+        self._shas = shas
+        self._hints = hints or bump_hints()
+        self._pending = None
+        self._tag_index = tag_index
+        self._done = False
+        self.latest = None
+        self.head_tagged = False
+        self.release = None
+        self.release_commit = None
+        self.bump = None
+        self.commits_since_release = 0
+
+    @property
+    def done(self):
+        """Whether the walk has reached the last release (or the root)"""
+        return self._done
+
+    def _finish(self):
+        """Stop walking, releasing the underlying commit source"""
+        self._done = True
+        close = getattr(self._commits, 'close', None)
+        if close:
+            close()
+
+    def _next_commit(self):
+        """The next commit, including one peeked at by `_head`"""
+        if self._pending is not None:
+            commit, self._pending = self._pending, None
+            return commit
+
+        return next(self._commits)
+
+    def _head(self):
+        """The sha of the first commit, which the walk has yet to step"""
+        if self._pending is None:
+            self._pending = next(self._commits, None)
+
+        return self._pending[0] if self._pending else None
+
+    def _find_latest_from_shas(self):
+        """
+        Find the latest version from commit shas only. Returns False if
+        that was not possible and the walk has to find it instead.
+        """
+        shas, self._shas = iter(self._shas), None
+        head = self._head()
+        try:
+            for sha in shas:
+                version = self._tag_index.version_at(sha)
+                if version is not None:
+                    self.latest = version
+                    self.head_tagged = sha == head
+                    return True
+        except AvakasError:
+            # the walk reports whatever went wrong
+            return False
+        finally:
+            close = getattr(shas, 'close', None)
+            if close:
+                close()
+
+        return True
+
+    def _step(self):
+        """Look at the next commit, returns False once the walk is over"""
+        if self._done:
+            return False
+
+        try:
+            sha, message = self._next_commit()
+        except StopIteration:
+            self._finish()
+            return False
+
+        if self.latest is None:
+            version = self._tag_index.version_at(sha)
+            if version is not None:
+                self.latest = version
+                self.head_tagged = self.commits_since_release == 0
+
+        release = self._tag_index.release_at(sha)
+        if release is not None:
+            self.release = release
+            self.release_commit = sha
+            self._finish()
+            return False
+
+        self.commits_since_release += 1
+        # the release is still to be found, but nothing outranks major
+        if self.bump != MAJOR:
+            self.bump = max_bump(self.bump, self._hints.hint(message))
+        return True
+
+    def find_latest(self):
+        """
+        Walk until the most recent version tag, whether prerelease or
+        no, and return it. Returns None if there is no version tag.
+        """
+        with timed('history'):
+            if self.latest is None and self._shas is not None and \
+               self.commits_since_release == 0 and \
+               self._find_latest_from_shas():
+                return self.latest
+
+            while self.latest is None and self._step():
+                pass
+
+        return self.latest
+
+    def walk(self):
+        """Walk until the last release"""
+        with timed('history'):
+            while self._step():
+                pass
+
+        return self
+
+
+class ScopedHistoryWalk():
+    """
+    A `HistoryWalk` for one of many projects in a repository. Version
+    tags are found on any commit, walking commit shas in the same order
+    as `HistoryWalk` so both find the same versions, while bump hints
+    only come from commits since the last release which change
+    `paths`. Git limits the walk to those commits itself, using
+    changed-path Bloom filters from the commit-graph when there are
+    some, so commits which only touch other projects are never sent to
+    us. As the release is already known, the walk stops at the first
+    major bump hint.
+    """
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, directory, rev, paths, tag_index, hints=None):
+        self._directory = directory
+        self._hints = hints or bump_hints()
+        self._rev = rev
+        self._paths = paths
+        self._tag_index = tag_index
+        self._tags_walked = False
+        self._done = False
+        self.latest = None
+        self.head_tagged = False
+        self.release = None
+        self.release_commit = None
+        self.bump = None
+        self.commits_since_release = 0
+
+    @property
+    def done(self):
+        """Whether the walk has reached the last release (or the root)"""
+        return self._done
+
+    def _walk_tags(self):
+        """Find the latest version and release from commit shas"""
+        self._tags_walked = True
+        with closing(iter_shas(self._directory, self._rev)) as shas:
+            for position, sha in enumerate(shas):
+                version = self._tag_index.version_at(sha)
+                if version is not None and self.latest is None:
+                    self.latest = version
+                    self.head_tagged = position == 0
+
+                release = self._tag_index.release_at(sha)
+                if release is not None:
+                    self.release = release
+                    self.release_commit = sha
+                    return
+
+    def find_latest(self):
+        """
+        Find the most recent version tag, whether prerelease or no, and
+        return it. Returns None if there is no version tag.
+        """
+        with timed('history'):
+            if not self._tags_walked:
+                self._walk_tags()
+
+        return self.latest
+
+    def walk(self):
+        """Collect bump hints from the commits since the last release"""
+        self.find_latest()
+        if self._done:
+            return self
+
+        rev = self._rev
+        if self.release_commit:
+            rev = f"{self.release_commit}..{rev}"
+        with timed('history'), \
+                closing(iter_log(self._directory, rev, self._paths)) as log:
+            for _sha, message in log:
+                self.commits_since_release += 1
+                self.bump = max_bump(self.bump, self._hints.hint(message))
+                if self.bump == MAJOR:
+                    break
+
+        self._done = True
+        return self
@@ -0,0 +1,108 @@
+"""
+Avakas Multi Repository Bumps
+
+Bumps many repositories concurrently for `bump --multi`. Pulling before
+a bump and pushing after it wait on the network, and run as asyncio git
+subprocesses, while reading, bumping, committing and tagging run on a
+thread pool. At most `concurrency` repositories are in flight at once.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from avakas import gitasync
+from avakas.avakas import detect_flavor_class
+from avakas.errors import AvakasError, error_message
+from avakas.flavors.base import AvakasLegacy
+from avakas.workspace import Workspace
+
+
+async def pull_checked_out(directory, workspace, fetch='if-stale',
+                           remote='origin', branch='mainline', **_kwargs):
+    """
+    Pull the branch of a legacy flavored repository before bumping it,
+    if it is checked out, and record the pull with the workspace so the
+    flavor does not pull again. A pull is a single round trip, so the
+    remote is not asked whether it is newer first. Repositories with
+    another branch checked out are left to the flavor.
+    """
+    if fetch == 'never':
+        return
+
+    if await gitasync.current_branch(directory) != branch:
+        return
+
+    if workspace.first_fetch(directory, remote, branch):
+        await gitasync.pull(directory, remote, branch)
+
+
+async def bump_repository(directory, bump_local, executor, **kwargs):
+    """
+    Bump one repository, returning a dict of its results or of the
+    error which stopped it, whatever that was
+    """
+    loop = asyncio.get_running_loop()
+    result = {'directory': directory}
+    try:
+        if not os.path.exists(directory):
+            raise AvakasError(f"Directory {directory} does not exist.")
+
+        options = dict(kwargs, directory=[directory])
+        flavor = await loop.run_in_executor(
+            executor, partial(detect_flavor_class, **options))
+        if issubclass(flavor, AvakasLegacy):
+            await pull_checked_out(directory, **kwargs)
+
+        project = flavor(**options)
+        result.update(await loop.run_in_executor(
+            executor, partial(bump_local, project, **options)))
+
+        result['pushed'] = False
+        if project.pending_push:
+            remote, refspecs = project.pending_push
+            await gitasync.push(directory, remote, refspecs)
+            result['pushed'] = True
+    except Exception as err:  # pylint: disable=broad-except
+        # one broken repository must not stop the others being reported
+        result['error'] = error_message(err)
+
+    return result
+
+
+async def bump_repositories(directories, bump_local, report, concurrency=8,
+                            **kwargs):
+    """
+    Bump many repositories concurrently. `bump_local` reads and bumps a
+    flavor instance, returning a dict of results, and is run on a thread
+    pool. `report` is called with the results of each repository, in the
+    order they were given.
+
+    Returns:
+        * `bool` whether every repository was bumped without error
+    """
+    if concurrency < 1:
+        raise AvakasError('A concurrency of at least one is required')
+
+    semaphore = asyncio.Semaphore(concurrency)
+    # each repository is given as its own directory
+    kwargs.pop('directory', None)
+    kwargs['workspace'] = Workspace()
+    kwargs['defer_push'] = True
+
+    async def limited(directory):
+        async with semaphore:
+            return await bump_repository(directory, bump_local, executor,
+                                         **kwargs)
+
+    succeeded = True
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        tasks = [asyncio.ensure_future(limited(directory))
+                 for directory in directories]
+        for task in tasks:
+            result = await task
+            succeeded = succeeded and 'error' not in result
+            report(result)
+
+    return succeeded
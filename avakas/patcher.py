@@ -0,0 +1,163 @@
+"""
+Avakas In-Place Version Patching
+
+Finds the version in a project file and replaces only those bytes,
+leaving the rest of the file exactly as it was. Large files are memory
+mapped rather than read, and files are replaced atomically by writing a
+temporary file next to them and renaming it over the original.
+
+Versions are found by locators, functions taking the contents of a file
+as a bytes-like object and returning the (start, end) span of the
+version, or None if there is no version. Locators and the patterns they
+use are built once per process and shared by every project of a flavor.
+"""
+
+import json
+import mmap
+import os
+import re
+import secrets
+import stat
+from contextlib import contextmanager
+from functools import lru_cache
+
+# files at least this large are memory mapped rather than read
+MMAP_THRESHOLD = 1024 * 1024
+JSON_STRING = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+# anything but brackets, including strings which may contain brackets
+JSON_PLAIN = re.compile(rb'[^"{}\[\]]*(?:' + JSON_STRING +
+                        rb'[^"{}\[\]]*)*')
+JSON_BRACKET = re.compile(JSON_PLAIN.pattern + rb'([{}\[\]])')
+JSON_DEPTH = {b'{': 1, b'[': 1, b'}': -1, b']': -1}
+
+
+@lru_cache(maxsize=None)
+def compiled(pattern, flags=re.MULTILINE):
+    """
+    A regex compiled once per process, multiline by default as patterns
+    are matched against whole files
+    """
+    return re.compile(pattern, flags)
+
+
+@lru_cache(maxsize=None)
+def regex_locator(pattern, group='vsn'):
+    """
+    A locator for the named group of the first match of a bytes regex,
+    given as a string or compiled
+    """
+    if not isinstance(pattern, re.Pattern):
+        pattern = compiled(pattern)
+
+    def locate(buffer):
+        match = pattern.search(buffer)
+        return match.span(group) if match else None
+
+    return locate
+
+
+@lru_cache(maxsize=None)
+def json_locator(key='version'):
+    """
+    A locator for the string value of a key of the top level JSON
+    object. Occurrences of the key are found by regex, then checked to
+    be at the top level by counting the brackets before them, so nothing
+    in the document is parsed.
+    """
+    pair = re.compile(re.escape(json.dumps(key).encode('utf8')) +
+                      rb'\s*:\s*"([^"\\]*(?:\\.[^"\\]*)*)"')
+
+    def locate(buffer):
+        brackets = JSON_BRACKET.finditer(buffer)
+        bracket = next(brackets, None)
+        pos = 0
+        depth = 0
+        for match in pair.finditer(buffer):
+            while bracket is not None and bracket.end() <= match.start():
+                depth += JSON_DEPTH[bracket.group(1)]
+                pos = bracket.end()
+                bracket = next(brackets, None)
+
+            # at the top level, and not within a string
+            if depth == 1 and JSON_PLAIN.fullmatch(buffer, pos,
+                                                   match.start()):
+                return match.span(1)
+
+        return None
+
+    return locate
+
+
+@contextmanager
+def _contents(path):
+    """The contents of a file, memory mapped if it is large"""
+    with open(path, 'rb') as handle:
+        if os.fstat(handle.fileno()).st_size < MMAP_THRESHOLD:
+            yield handle.read()
+            return
+
+        with mmap.mmap(handle.fileno(), 0,
+                       access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def find_version(path, locate):
+    """The version found in a file, or None"""
+    with _contents(path) as buffer:
+        span = locate(buffer)
+        if span is None:
+            return None
+
+        return bytes(buffer[span[0]:span[1]]).decode('utf8')
+
+
+def patch_version(path, locate, version):
+    """
+    Replace the version found in a file. Returns False, leaving the
+    file alone, if there is no version to replace.
+    """
+    version = version.encode('utf8')
+    with _contents(path) as buffer:
+        span = locate(buffer)
+        if span is None:
+            return False
+
+        start, end = span
+        if buffer[start:end] != version:
+            with memoryview(buffer) as view:
+                _replace(path, [view[:start], version, view[end:]])
+
+    return True
+
+
+def write_atomic(path, data):
+    """Replace the contents of a file atomically"""
+    _replace(path, [data.encode('utf8')])
+
+
+def _replace(path, chunks):
+    """
+    Write chunks of bytes to a temporary file beside `path`, then rename
+    it over `path`. Symlinks are followed and permissions are kept.
+    """
+    path = os.path.realpath(path)
+    directory, name = os.path.split(path)
+    tmp_path = os.path.join(directory,
+                            f".{name}.{secrets.token_hex(4)}.avakas")
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = None
+
+    # unlike mkstemp this honours the umask, for files which are new
+    handle = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(handle, 'wb') as tmp_file:
+            for chunk in chunks:
+                tmp_file.write(chunk)
+            if mode is not None:
+                os.fchmod(tmp_file.fileno(), mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
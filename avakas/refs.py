@@ -0,0 +1,150 @@
+"""
+Avakas Git Ref Helpers
+
+Reads repository state straight from the git directory, without
+spawning git or loading GitPython, for the cheap checks done before
+any real git work.
+"""
+
+import hashlib
+import os
+
+TAGS_DIR = os.path.join('refs', 'tags')
+
+
+def find_git_dir(directory):
+    """
+    Find the git directory for a path, searching parent directories.
+
+    Returns:
+        * (`str` git dir, `str` common dir) or None when `directory` is
+          not within a git repository
+    """
+    directory = os.path.abspath(directory)
+    while True:
+        dotgit = os.path.join(directory, '.git')
+        git_dir = None
+        if os.path.isdir(dotgit):
+            git_dir = dotgit
+        elif os.path.isfile(dotgit):
+            # worktrees and submodules point at their git dir
+            with open(dotgit, 'r', encoding='utf8') as handle:
+                line = handle.readline().strip()
+            if line.startswith('gitdir:'):
+                git_dir = os.path.join(directory, line[7:].strip())
+
+        if git_dir:
+            return git_dir, common_dir(git_dir)
+
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+
+def common_dir(git_dir):
+    """The directory holding shared refs for a (possibly worktree) git dir"""
+    path = os.path.join(git_dir, 'commondir')
+    if not os.path.exists(path):
+        return git_dir
+
+    with open(path, 'r', encoding='utf8') as handle:
+        return os.path.normpath(os.path.join(git_dir, handle.read().strip()))
+
+
+def read_packed_refs(common):
+    """
+    Parse packed-refs into a dict of refname to sha. Peeled lines are
+    skipped.
+    """
+    refs = {}
+    path = os.path.join(common, 'packed-refs')
+    if not os.path.exists(path):
+        return refs
+
+    with open(path, 'r', encoding='utf8') as handle:
+        for line in handle:
+            if line.startswith(('#', '^')):
+                continue
+            sha, _sep, name = line.rstrip('\n').partition(' ')
+            refs[name] = sha
+
+    return refs
+
+
+def resolve_ref(git_dir, common, ref, depth=5):
+    """
+    Resolve a ref name (or `HEAD`) to a sha, following symbolic refs.
+    Returns None if the ref does not exist.
+    """
+    for base in (git_dir, common):
+        path = os.path.join(base, ref)
+        if os.path.isfile(path):
+            with open(path, 'r', encoding='utf8') as handle:
+                value = handle.read().strip()
+            if value.startswith('ref:'):
+                if depth == 0:
+                    return None
+                return resolve_ref(git_dir, common, value[4:].strip(),
+                                   depth=depth - 1)
+            return value or None
+
+    return read_packed_refs(common).get(ref)
+
+
+def has_commit_graph(common):
+    """
+    Whether git keeps a commit-graph (single file or split chain) for
+    the repository, which makes walking history within git cheap
+    """
+    info = os.path.join(common, 'objects', 'info')
+    return os.path.isfile(os.path.join(info, 'commit-graph')) or \
+        os.path.isdir(os.path.join(info, 'commit-graphs'))
+
+
+def is_shallow(common):
+    """Whether the repository is a shallow clone, missing older history"""
+    return os.path.isfile(os.path.join(common, 'shallow'))
+
+
+def file_stamp(path):
+    """
+    A cheap change stamp for a file; None if it does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    return [stat.st_mtime_ns, stat.st_size, stat.st_ino]
+
+
+def file_digest(path):
+    """
+    Content digest of a (small) file; None if it does not exist
+    """
+    try:
+        with open(path, 'rb') as handle:
+            return hashlib.sha1(handle.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def tag_refs_fingerprint(common):
+    """
+    Fingerprint the state of tag refs from the packed-refs stamp and
+    the stamps of every loose tag ref. Any tag being created, moved,
+    deleted or packed changes the fingerprint.
+    """
+    digest = hashlib.sha1()
+    digest.update(repr(file_stamp(os.path.join(common,
+                                               'packed-refs'))).encode())
+    tags_dir = os.path.join(common, TAGS_DIR)
+    for root, dirs, files in os.walk(tags_dir):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            stamp = repr((os.path.relpath(path, tags_dir), file_stamp(path)))
+            digest.update(stamp.encode('utf8'))
+
+    return digest.hexdigest()
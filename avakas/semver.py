@@ -0,0 +1,402 @@
+"""
+Avakas Versions
+
+`SemVer` is the immutable version value used throughout avakas, with
+`semantic_version.Version` only used to validate unusual version strings
+and for interoperability.
+
+Versions are ordered by a compact key of (major, minor, patch, release)
+integers, which is cheap to build from a version string and to compare.
+Versions only share a key when they are prereleases (or builds) of the
+same release, and only those ties are settled by full semantic version
+rules, so sorting or picking the highest of many tags does not parse
+every one of them.
+"""
+
+import operator
+import re
+from collections import namedtuple
+from functools import cmp_to_key
+
+from semantic_version import Version
+
+# a subset of what semantic_version accepts, anything else is parsed
+# the slow way to find out if it is a version at all
+VERSION_KEY = re.compile(
+    r'(0|[1-9][0-9]*)\.(0|[1-9][0-9]*)\.(0|[1-9][0-9]*)'
+    r'(?:-((?:0|[1-9][0-9]*|[0-9]*[a-zA-Z-][0-9a-zA-Z-]*)'
+    r'(?:\.(?:0|[1-9][0-9]*|[0-9]*[a-zA-Z-][0-9a-zA-Z-]*))*))?'
+    r'(?:\+([0-9a-zA-Z-]+(?:\.[0-9a-zA-Z-]+)*))?')
+# sorts a release after any of its prereleases
+RELEASE_IDENTIFIERS = ((2, ''),)
+# sorts after any numeric identifier and before any alphanumeric one
+FIRST_ALPHANUMERIC = (1, '')
+# one clause of a version spec, the version may be partial (i.e. `2`)
+SPEC_CLAUSE = re.compile(r'\s*(>=|<=|==|!=|>|<|=|\^|~)?\s*v?([^\s,]+)\s*')
+PARTIAL_VERSION = re.compile(r'(0|[1-9][0-9]*)(?:\.(0|[1-9][0-9]*))?')
+SPEC_OPERATORS = {
+    '>=': operator.ge,
+    '>': operator.gt,
+    '<=': operator.le,
+    '<': operator.lt,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+
+def _identifiers_key(identifiers):
+    """Numeric identifiers sort numerically and before alphanumeric ones"""
+    return tuple((0, int(part)) if part.isdigit() else (1, part)
+                 for part in identifiers)
+
+
+class SemVer(namedtuple('SemVer', ['major', 'minor', 'patch', 'prerelease',
+                                   'build'])):
+    """
+    An immutable semantic version, compared like `semantic_version.Version`
+    in that build metadata counts for equality but not for precedence.
+    Being immutable, copies are the same object and versions may be used
+    as dict keys.
+    """
+    __slots__ = ()
+
+    def __new__(cls, major=0, minor=0, patch=0, prerelease=(), build=()):
+        return super().__new__(cls, int(major), int(minor), int(patch),
+                               tuple(str(part) for part in prerelease),
+                               tuple(str(part) for part in build))
+
+    @classmethod
+    def parse(cls, text):
+        """
+        The version for a version string. Raises `ValueError` if it is
+        not a valid semantic version.
+        """
+        match = VERSION_KEY.fullmatch(text)
+        if match is None:
+            return cls.coerce(Version(text))
+
+        major, minor, patch, prerelease, build = match.groups()
+        return cls(major, minor, patch,
+                   prerelease.split('.') if prerelease else (),
+                   build.split('.') if build else ())
+
+    @classmethod
+    def coerce(cls, version):
+        """
+        The version for a `SemVer`, a `semantic_version.Version` or a
+        version string
+        """
+        if isinstance(version, cls):
+            return version
+        if isinstance(version, str):
+            return cls.parse(version)
+
+        return cls(version.major, version.minor, version.patch,
+                   version.prerelease or (), version.build or ())
+
+    def to_semantic(self):
+        """The equivalent `semantic_version.Version`"""
+        return Version(major=self.major, minor=self.minor, patch=self.patch,
+                       prerelease=self.prerelease, build=self.build)
+
+    def replace(self, **changes):
+        """A copy of this version with some fields changed"""
+        fields = {'major': self.major, 'minor': self.minor,
+                  'patch': self.patch, 'prerelease': self.prerelease,
+                  'build': self.build}
+        fields.update(changes)
+        return SemVer(**fields)
+
+    def next_major(self):
+        """The next major release, which a prerelease may already be of"""
+        if self.prerelease and self.minor == 0 and self.patch == 0:
+            return SemVer(self.major, 0, 0)
+
+        return SemVer(self.major + 1, 0, 0)
+
+    def next_minor(self):
+        """The next minor release, which a prerelease may already be of"""
+        if self.prerelease and self.patch == 0:
+            return SemVer(self.major, self.minor, 0)
+
+        return SemVer(self.major, self.minor + 1, 0)
+
+    def next_patch(self):
+        """The next patch release, which a prerelease may already be of"""
+        if self.prerelease:
+            return SemVer(self.major, self.minor, self.patch)
+
+        return SemVer(self.major, self.minor, self.patch + 1)
+
+    def truncate(self, level='patch'):
+        """This version without the parts after `level`"""
+        if level == 'build':
+            return self
+        if level == 'prerelease':
+            return self.replace(build=())
+        if level == 'patch':
+            return SemVer(self.major, self.minor, self.patch)
+        if level == 'minor':
+            return SemVer(self.major, self.minor, 0)
+
+        return SemVer(self.major, 0, 0)
+
+    def precedence_key(self):
+        """The precedence of this version, which ignores build metadata"""
+        prerelease = _identifiers_key(self.prerelease) \
+            if self.prerelease else RELEASE_IDENTIFIERS
+        return (self.major, self.minor, self.patch, prerelease)
+
+    def sort_key(self):
+        """The precedence of this version, then its build metadata"""
+        return self.precedence_key() + (_identifiers_key(self.build),)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __str__(self):
+        text = f"{self.major}.{self.minor}.{self.patch}"
+        if self.prerelease:
+            text += '-' + '.'.join(self.prerelease)
+        if self.build:
+            text += '+' + '.'.join(self.build)
+
+        return text
+
+    def __repr__(self):
+        return f"SemVer('{self}')"
+
+    def __hash__(self):
+        return tuple.__hash__(self)
+
+    def __eq__(self, other):
+        if isinstance(other, Version):
+            other = SemVer.coerce(other)
+        if not isinstance(other, SemVer):
+            # plain tuples would otherwise compare equal field by field
+            return False if isinstance(other, tuple) else NotImplemented
+
+        return tuple.__eq__(self, other)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def _precedences(self, other):
+        """Both precedence keys, or None if `other` is not a version"""
+        if isinstance(other, Version):
+            other = SemVer.coerce(other)
+        if not isinstance(other, SemVer):
+            return None
+
+        return self.precedence_key(), other.precedence_key()
+
+    def __lt__(self, other):
+        keys = self._precedences(other)
+        return NotImplemented if keys is None else keys[0] < keys[1]
+
+    def __le__(self, other):
+        keys = self._precedences(other)
+        return NotImplemented if keys is None else keys[0] <= keys[1]
+
+    def __gt__(self, other):
+        keys = self._precedences(other)
+        return NotImplemented if keys is None else keys[0] > keys[1]
+
+    def __ge__(self, other):
+        keys = self._precedences(other)
+        return NotImplemented if keys is None else keys[0] >= keys[1]
+
+
+def version_key(version):
+    """
+    The compact sort key of a version string, `SemVer` or
+    `semantic_version.Version`, or None if it is not a valid semantic
+    version. Releases sort after their prereleases. Versions with equal
+    keys need `compare_versions`.
+    """
+    if not isinstance(version, str):
+        return (version.major, version.minor, version.patch,
+                0 if version.prerelease else 1)
+
+    match = VERSION_KEY.fullmatch(version)
+    if match is None:
+        try:
+            return version_key(SemVer.parse(version))
+        except ValueError:
+            return None
+
+    # builds are left to ties, as are prereleases of the same release
+    major, minor, patch, prerelease, _build = match.groups()
+    return (int(major), int(minor), int(patch), 0 if prerelease else 1)
+
+
+def compare_tied(left, right):
+    """Full semantic version comparison, for versions sharing a key"""
+    left = SemVer.coerce(left).sort_key()
+    right = SemVer.coerce(right).sort_key()
+    return (left > right) - (left < right)
+
+
+def compare_versions(left, right, left_key=None):
+    """
+    Compare two versions (strings, `SemVer` or `semantic_version.Version`),
+    like `semantic_version.compare` but only parsing them on a tie. The
+    key of `left` may be passed in when it is already known.
+    """
+    left_key = left_key or version_key(left)
+    right_key = version_key(right)
+    if left_key != right_key:
+        return -1 if left_key < right_key else 1
+
+    return compare_tied(left, right)
+
+
+def max_version(versions):
+    """
+    The highest of any number of versions (strings, `SemVer` or
+    `semantic_version.Version`), as given. Versions which are not valid
+    semantic versions are ignored. Returns None if there are none.
+    """
+    best_key = None
+    ties = []
+    for version in versions:
+        key = version_key(version)
+        if key is None or (best_key is not None and key < best_key):
+            continue
+        if key != best_key:
+            best_key = key
+            ties = []
+        ties.append(version)
+
+    if len(ties) > 1:
+        return max(ties, key=cmp_to_key(compare_tied))
+
+    return ties[0] if ties else None
+
+
+def sort_versions(versions):
+    """
+    Sort versions (strings, `SemVer` or `semantic_version.Version`) lowest
+    first. Raises `ValueError` if any of them are not valid semantic
+    versions.
+    """
+    keyed = []
+    for version in versions:
+        key = version_key(version)
+        if key is None:
+            raise ValueError(f"Invalid version string: {version!r}")
+        keyed.append((key, version))
+
+    keyed.sort(key=lambda pair: pair[0])
+    result = []
+    start = 0
+    while start < len(keyed):
+        end = start + 1
+        while end < len(keyed) and keyed[end][0] == keyed[start][0]:
+            end += 1
+        tied = [version for _key, version in keyed[start:end]]
+        if len(tied) > 1:
+            tied.sort(key=cmp_to_key(compare_tied))
+        result += tied
+        start = end
+
+    return result
+
+
+def prerelease_bounds(release, prefix=()):
+    """
+    The precedence keys bounding the prereleases of a release whose
+    identifiers start with `prefix` followed by a number, i.e. `rc.1`
+    and `rc.2` but not `rc.x` for the `rc` prefix. The prereleases lie
+    between the two, the first included and the second not.
+    """
+    release = SemVer.coerce(release)
+    identifiers = _identifiers_key(prefix)
+    return ((release.major, release.minor, release.patch, identifiers),
+            (release.major, release.minor, release.patch,
+             identifiers + (FIRST_ALPHANUMERIC,)))
+
+
+def _spec_version(text):
+    """
+    The version of a spec clause and how many of its major, minor and
+    patch parts were given. Raises `ValueError` if it is not a version.
+    """
+    match = PARTIAL_VERSION.fullmatch(text)
+    if match is None:
+        return SemVer.parse(text), 3
+
+    major, minor = match.groups()
+    return SemVer(major, minor or 0, 0), 1 if minor is None else 2
+
+
+def _spec_clauses(operation, version, parts):
+    """The (operation, version) clauses for one clause of a spec"""
+    # upper bounds are built directly, as the next major version of a
+    # prerelease (i.e. 1.0.0-rc.1) is its own release
+    if operation == '^':
+        # up to the next change of the leftmost non zero part
+        if version.major or parts == 1:
+            upper = SemVer(version.major + 1, 0, 0)
+        elif version.minor or parts == 2:
+            upper = SemVer(0, version.minor + 1, 0)
+        else:
+            upper = SemVer(0, 0, version.patch + 1)
+        return [('>=', version), ('<', upper)]
+
+    if operation == '~':
+        upper = SemVer(version.major, version.minor + 1, 0) if parts > 1 \
+            else SemVer(version.major + 1, 0, 0)
+        return [('>=', version), ('<', upper)]
+
+    return [({'=': '==', None: '=='}.get(operation, operation), version)]
+
+
+class VersionSpec():
+    """
+    A range of versions, given as comma separated clauses which must all
+    match, i.e. `>=1.2,<2`. Clauses compare with `>=`, `>`, `<=`, `<`,
+    `==` (the default) or `!=`, or are `^1.2` (up to the next major
+    version) or `~1.2` (up to the next minor version). Parts left out of
+    a version are zero. Build metadata is ignored.
+
+    As with npm, prereleases only match when a clause names a prerelease
+    of the same release, so `>=1,<2` matches 1.x releases while
+    `>=2.3.0-0,<2.3.0` matches every prerelease of 2.3.0.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.clauses = []
+        for part in text.split(','):
+            match = SPEC_CLAUSE.fullmatch(part)
+            try:
+                if match is None:
+                    raise ValueError(part)
+                operation, version = match.groups()
+                version, parts = _spec_version(version)
+            except ValueError as err:
+                raise ValueError(f"Invalid version spec: {text!r}") from err
+            self.clauses += _spec_clauses(operation, version, parts)
+
+        self._prereleases = {version.truncate()
+                             for _operation, version in self.clauses
+                             if version.prerelease}
+
+    def match(self, version):
+        """Whether a version is within the spec"""
+        version = SemVer.coerce(version)
+        if version.prerelease and \
+           version.truncate() not in self._prereleases:
+            return False
+
+        key = version.precedence_key()
+        return all(SPEC_OPERATORS[operation](key, bound.precedence_key())
+                   for operation, bound in self.clauses)
+
+    def __str__(self):
+        return self.text
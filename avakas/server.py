@@ -0,0 +1,131 @@
+"""
+Avakas Daemon
+
+Answers show, bump and set requests on a Unix socket from a long running
+process, which keeps one `avakas.workspace.Workspace` warm between
+requests. Interpreter startup, GitPython setup and tag scanning are paid
+once, and tags are only read again when their ref files change.
+
+Requests and responses are single lines of JSON. A request carries the
+parsed command line arguments and the client environment, a response
+carries the exit status and everything written to stdout and stderr.
+"""
+
+import io
+import json
+import os
+import socket
+import socketserver
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+
+from avakas.errors import AvakasError
+from avakas.workspace import Workspace
+
+
+class AvakasRequestHandler(socketserver.StreamRequestHandler):
+    """Handles one request per connection"""
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            # a connection without a request, i.e. checking for a server
+            return
+
+        try:
+            request = json.loads(line)
+        except ValueError:
+            response = {'status': 2, 'stdout': '',
+                        'stderr': 'Problem: Malformed request\n'}
+        else:
+            response = self.server.execute(request)
+
+        try:
+            self.wfile.write(json.dumps(response).encode('utf8') + b'\n')
+        except OSError:
+            # the client went away, the operation still happened
+            pass
+
+
+class AvakasServer(socketserver.UnixStreamServer):
+    """
+    Serves requests one at a time, as they redirect the process wide
+    stdout and may write to the same repositories. `operations` maps
+    operation names to a function running one, returning its exit
+    status.
+    """
+
+    def __init__(self, path, operations):
+        self.operations = operations
+        self.workspace = Workspace()
+        super().__init__(path, AvakasRequestHandler)
+
+    def execute(self, request):
+        """Run the operation described by a request"""
+        kwargs = dict(request.get('kwargs') or {})
+        operation = self.operations.get(kwargs.get('operation'))
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        if operation is None:
+            return {'status': 2, 'stdout': '',
+                    'stderr': 'Problem: Unsupported operation\n'}
+
+        self.workspace.refresh()
+        kwargs['workspace'] = self.workspace
+        kwargs['environ'] = request.get('environ') or {}
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                status = operation(**kwargs)
+            except SystemExit as sys_exit:
+                status = sys_exit.code
+            except Exception:  # pylint: disable=broad-except
+                # a broken request must not take the server down
+                traceback.print_exc()
+                status = 1
+
+        if status is None or isinstance(status, bool):
+            status = int(bool(status))
+        elif not isinstance(status, int):
+            status = 1
+
+        return {'status': status,
+                'stdout': stdout.getvalue(),
+                'stderr': stderr.getvalue()}
+
+
+def claim_socket(path):
+    """
+    Remove a stale socket left behind by a server which is gone, refusing
+    to take over the socket of one which is still running
+    """
+    if not os.path.exists(path):
+        return
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except OSError:
+            os.unlink(path)
+            return
+
+    raise AvakasError(f"An avakas server is already listening on {path}")
+
+
+def send_request(path, kwargs, environ):
+    """Send a request to the server listening on `path`"""
+    payload = json.dumps({'kwargs': kwargs, 'environ': environ})
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(path)
+            sock.sendall(payload.encode('utf8') + b'\n')
+            with sock.makefile('rb') as response:
+                line = response.readline()
+    except OSError as err:
+        raise AvakasError(f"Unable to reach avakas server at {path}: "
+                          f"{err}") from err
+
+    try:
+        return json.loads(line)
+    except ValueError as err:
+        raise AvakasError(f"Bad response from avakas server at {path}") \
+            from err
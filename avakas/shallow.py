@@ -0,0 +1,174 @@
+"""
+Avakas Shallow Clone Deepening
+
+Shallow clones (i.e. `git clone --depth 1` in CI) often stop short of
+the last version tag. Rather than fetching all of history, the clone is
+deepened a step at a time, each step twice as deep as the one before,
+until the branch reaches a commit which the remote has a version tag
+on. Only the version tags on fetched commits are fetched themselves.
+"""
+
+import os
+import subprocess
+from collections import namedtuple
+
+from avakas.errors import AvakasError
+from avakas.refs import find_git_dir, is_shallow
+from avakas.tags import TAG_REF_PREFIX, TagIndex, read_tag_refs
+
+# commits fetched by the first step, doubling with every step after it
+DEEPEN_FIRST = 16
+
+Deepened = namedtuple('Deepened', ['commits', 'tags', 'round_trips',
+                                   'bytes'])
+Deepened.__doc__ = """
+What deepening a shallow clone took: the `int` number of commits
+fetched, a dict of the version tags fetched (tag name to commit sha),
+the `int` number of requests made to the remote and the `int` number of
+bytes the object store grew by.
+"""
+
+
+def _git(directory, *args):
+    """Run git in `directory`, returning its output"""
+    env = dict(os.environ, GIT_TERMINAL_PROMPT='0')
+    try:
+        result = subprocess.run(['git'] + list(args),
+                                cwd=directory,
+                                env=env,
+                                check=True,
+                                stdin=subprocess.DEVNULL,
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE)
+    except subprocess.CalledProcessError as err:
+        lines = err.stderr.decode('utf8', errors='replace').strip() \
+            .splitlines()
+        detail = lines[-1] if lines else f"exit status {err.returncode}"
+        raise AvakasError(f"git {args[0]} failed: {detail}") from err
+
+    return result.stdout.decode('utf8', errors='replace')
+
+
+def remote_tags(directory, remote):
+    """
+    The tags of a remote as a dict of tag name to commit sha, with
+    annotated tags peeled, from a single `git ls-remote`
+    """
+    tags = {}
+    for line in _git(directory, 'ls-remote', '--tags', remote).splitlines():
+        sha, _sep, ref = line.partition('\t')
+        if not ref.startswith(TAG_REF_PREFIX):
+            continue
+
+        name = ref[len(TAG_REF_PREFIX):]
+        if name.endswith('^{}'):
+            tags[name[:-3]] = sha
+        else:
+            tags.setdefault(name, sha)
+
+    return tags
+
+
+def _branch_commits(directory, branch):
+    """The shas of every commit of a branch which is in the clone"""
+    return set(_git(directory, 'rev-list', branch, '--').split())
+
+
+def _object_bytes(common):
+    """The size of the object store, to tell how much fetches received"""
+    total = 0
+    for root, _dirs, files in os.walk(os.path.join(common, 'objects')):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                # i.e. loose objects removed by a concurrent gc
+                pass
+
+    return total
+
+
+def _tagged(index, release=False):
+    """The commits of a tag index with a (release) version on them"""
+    return set(index.releases if release else index.versions)
+
+
+def _deepen(directory, remote, branch, commits, wanted):
+    """
+    Deepen the clone, doubling the step each time, until the commits of
+    the branch include one of the `wanted` commits or there is no more
+    history to fetch
+
+    Returns:
+        * (`set` of the commits of the branch, `int` fetches made)
+    """
+    common = find_git_dir(directory)[1]
+    fetches = 0
+    step = DEEPEN_FIRST
+    while wanted and not commits & wanted and is_shallow(common):
+        _git(directory, 'fetch', '--quiet', '--no-tags',
+             f"--deepen={step}", remote, branch)
+        fetches += 1
+        step *= 2
+        deeper = _branch_commits(directory, branch)
+        if len(deeper) == len(commits):
+            # the branch does not go back any further on the remote
+            break
+        commits = deeper
+
+    return commits, fetches
+
+
+def _fetch_tags(directory, remote, tags):
+    """
+    Fetch tags (a dict of tag name to commit sha) which are not already
+    local, returning those fetched
+    """
+    missing = dict(tags)
+    for name, commit in read_tag_refs(directory, names=list(tags)):
+        if missing.get(name) == commit:
+            del missing[name]
+
+    if missing:
+        _git(directory, 'fetch', '--quiet', '--no-tags', remote,
+             *[f"+{TAG_REF_PREFIX}{name}:{TAG_REF_PREFIX}{name}"
+               for name in missing])
+
+    return missing
+
+
+def deepen_to_tag(directory, remote, branch, tag_prefix='', release=False):
+    """
+    Deepen a shallow clone until `branch` reaches a commit with a
+    version tag (a release version tag with `release`, as auto bumps
+    walk back to the last release), then fetch the version tags on the
+    commits fetched. Nothing is fetched when a local version tag is
+    already reachable, and the remote is asked for its tags once.
+
+    Returns:
+        * `Deepened`, or None when the repository is not shallow
+    """
+    found = find_git_dir(directory)
+    if not found or not is_shallow(found[1]):
+        return None
+
+    commits = _branch_commits(directory, branch)
+    if commits & _tagged(TagIndex.load(directory, tag_prefix), release):
+        return Deepened(0, {}, 0, 0)
+
+    start_bytes = _object_bytes(found[1])
+    tags = remote_tags(directory, remote)
+    index = TagIndex(tag_prefix=tag_prefix)
+    for name, commit in tags.items():
+        index.add(name, commit)
+
+    deepened, fetches = _deepen(directory, remote, branch, commits,
+                                _tagged(index, release))
+    fetched = _fetch_tags(directory, remote,
+                          {name: commit for name, commit in tags.items()
+                           if commit in deepened and
+                           index.version_text(name) is not None})
+
+    return Deepened(len(deepened) - len(commits), fetched,
+                    1 + fetches + (1 if fetched else 0),
+                    _object_bytes(found[1]) - start_bytes)
@@ -0,0 +1,318 @@
+"""
+Avakas Git Tag Index
+"""
+
+import subprocess
+
+from avakas.errors import AvakasError
+from avakas.semver import SemVer, compare_versions, max_version, \
+    prerelease_bounds, sort_versions, version_key
+
+# objecttype and objectname of the ref, followed by the same fields for
+# the object an annotated tag points at (empty for lightweight tags)
+TAG_REF_FORMAT = '%(objecttype) %(objectname) ' \
+    '%(*objecttype) %(*objectname) %(refname)'
+TAG_REF_PREFIX = 'refs/tags/'
+# keeps the command line of for-each-ref well within limits
+TAG_REF_CHUNK = 256
+
+
+def read_tag_refs(directory, names=None):
+    """
+    Read every tag ref of the repository containing `directory` in a
+    single `git for-each-ref` pass, which covers both packed-refs and
+    loose refs. Annotated tags are peeled to the object they point at.
+    When `names` is given, only those tags are read.
+
+    Returns:
+        * `list` of (`str` tag name, `str` commit sha) tuples
+    """
+    if names is None:
+        patterns = [[TAG_REF_PREFIX]]
+    else:
+        names = [f"{TAG_REF_PREFIX}{name}" for name in names]
+        patterns = [names[i:i + TAG_REF_CHUNK]
+                    for i in range(0, len(names), TAG_REF_CHUNK)]
+
+    refs = []
+    for chunk in patterns:
+        refs += _for_each_tag_ref(directory, chunk)
+
+    return refs
+
+
+def _for_each_tag_ref(directory, patterns):
+    """Run one `git for-each-ref` over tag refs matching `patterns`"""
+    try:
+        output = subprocess.run(['git', 'for-each-ref',
+                                 f"--format={TAG_REF_FORMAT}"] + patterns,
+                                cwd=directory,
+                                check=True,
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE).stdout
+    except (OSError, subprocess.CalledProcessError) as err:
+        raise AvakasError(f"Unable to read tags for {directory}") from err
+
+    refs = []
+    for line in output.decode('utf8').splitlines():
+        obj_type, obj_name, peeled_type, peeled_name, ref = \
+            line.split(' ', 4)
+        if peeled_type:
+            obj_type, obj_name = peeled_type, peeled_name
+
+        if obj_type != 'commit':
+            continue
+
+        refs.append((ref[len(TAG_REF_PREFIX):], obj_name))
+
+    return refs
+
+
+def version_text(tag_prefix, name):
+    """
+    Returns the version part of a tag name, or None if the tag is not a
+    version tag with the given prefix
+    """
+    if not name.startswith(tag_prefix):
+        return None
+
+    text = name[len(tag_prefix):]
+    if version_key(text) is None:
+        return None
+
+    return text
+
+
+class TagIndex():
+    """
+    Maps commits to the highest version (and highest release version)
+    tagged on them. Tags which are not valid semantic versions once the
+    tag prefix is removed are ignored.
+
+    Versions are kept as strings and ordered by `avakas.semver` keys
+    until they are looked up, so neither building nor restoring an index
+    parses every tag. Looked up versions are `avakas.semver.SemVer`.
+    """
+
+    def __init__(self, tag_prefix='', versions=None, releases=None):
+        self.tag_prefix = tag_prefix or ''
+        self.versions = dict(versions or {})
+        self.releases = dict(releases or {})
+
+    @classmethod
+    def load(cls, directory, tag_prefix=''):
+        """Build an index from the tag refs of a repository"""
+        index = cls(tag_prefix=tag_prefix)
+        for name, commit in read_tag_refs(directory):
+            index.add(name, commit)
+
+        return index
+
+    def parse(self, name):
+        """
+        Returns the `avakas.semver.SemVer` for a tag name, or None if
+        the tag is not a version tag
+        """
+        text = self.version_text(name)
+        return None if text is None else SemVer.parse(text)
+
+    def version_text(self, name):
+        """
+        Returns the version part of a tag name, or None if the tag is
+        not a version tag. Cheaper than `parse` for most tags.
+        """
+        return version_text(self.tag_prefix, name)
+
+    def add(self, name, commit):
+        """Add a tag pointing at a commit sha to the index"""
+        text = self.version_text(name)
+        if text is None:
+            return
+
+        key = version_key(text)
+        current = self.versions.get(commit)
+        if current is None or compare_versions(text, current, key) > 0:
+            self.versions[commit] = text
+
+        if key[3]:
+            current = self.releases.get(commit)
+            if current is None or compare_versions(text, current, key) > 0:
+                self.releases[commit] = text
+
+    def reindex(self, commit, names):
+        """
+        Replace whatever is indexed for a commit sha with the given tag
+        names, i.e. once one of the tags on it has been removed
+        """
+        self.versions.pop(commit, None)
+        self.releases.pop(commit, None)
+        texts = [text for text in map(self.version_text, names)
+                 if text is not None]
+        latest = max_version(texts)
+        if latest is not None:
+            self.versions[commit] = latest
+        release = max_version(text for text in texts
+                              if version_key(text)[3])
+        if release is not None:
+            self.releases[commit] = release
+
+    @staticmethod
+    def _lookup(mapping, commit):
+        """Look up a version, parsing it on first use"""
+        version = mapping.get(commit)
+        if isinstance(version, str):
+            version = SemVer.parse(version)
+            mapping[commit] = version
+
+        return version
+
+    def version_at(self, commit):
+        """The highest version tagged on a commit sha, if any"""
+        return self._lookup(self.versions, commit)
+
+    def release_at(self, commit):
+        """The highest release version tagged on a commit sha, if any"""
+        return self._lookup(self.releases, commit)
+
+    def dump(self):
+        """The index as a JSON friendly dict, see `restore`"""
+        return {'versions': {commit: str(version)
+                             for commit, version in self.versions.items()},
+                'releases': {commit: str(version)
+                             for commit, version in self.releases.items()}}
+
+    @classmethod
+    def restore(cls, tag_prefix, data):
+        """An index from the output of `dump`"""
+        return cls(tag_prefix=tag_prefix,
+                   versions=data['versions'],
+                   releases=data['releases'])
+
+    def __len__(self):
+        return len(self.versions)
+
+    def __contains__(self, commit):
+        return commit in self.versions
+
+
+class VersionIndex():
+    """
+    Every version tagged with a tag prefix, lowest first, so ranges of
+    versions are found by binary search. As with `TagIndex`, versions
+    are kept as strings and only those looked at while searching are
+    parsed, so building or restoring an index parses hardly any tags.
+    """
+
+    def __init__(self, tag_prefix='', versions=None):
+        self.tag_prefix = tag_prefix or ''
+        self.versions = list(versions or [])
+        self._texts = set(self.versions)
+        self._parsed = {}
+
+    @classmethod
+    def build(cls, tag_prefix, names):
+        """An index of the version tags among some tag names"""
+        tag_prefix = tag_prefix or ''
+        texts = [text for text in (version_text(tag_prefix, name)
+                                   for name in names)
+                 if text is not None]
+        return cls(tag_prefix=tag_prefix, versions=sort_versions(texts))
+
+    def _version(self, position):
+        """The version at a position, parsed on first use"""
+        text = self.versions[position]
+        version = self._parsed.get(text)
+        if version is None:
+            version = SemVer.parse(text)
+            self._parsed[text] = version
+
+        return version
+
+    def _bisect(self, key, right=False, precedence=True):
+        """
+        Where a version with the given key (a precedence key, or a full
+        sort key without `precedence`) goes, before any equal ones or
+        after them with `right`
+        """
+        low, high = 0, len(self.versions)
+        while low < high:
+            middle = (low + high) // 2
+            version = self._version(middle)
+            probe = version.precedence_key() if precedence \
+                else version.sort_key()
+            if probe < key or (right and probe == key):
+                low = middle + 1
+            else:
+                high = middle
+
+        return low
+
+    def add(self, name):
+        """Add a tag to the index, if it is a version tag"""
+        text = version_text(self.tag_prefix, name)
+        if text is None or text in self._texts:
+            return
+
+        version = SemVer.parse(text)
+        self._parsed[text] = version
+        self.versions.insert(self._bisect(version.sort_key(),
+                                          precedence=False), text)
+        self._texts.add(text)
+
+    def remove(self, name):
+        """Remove a tag from the index, if it is there"""
+        text = version_text(self.tag_prefix, name)
+        if text is None or text not in self._texts:
+            return
+
+        # build metadata is part of the sort key, so the version is unique
+        position = self._bisect(SemVer.parse(text).sort_key(),
+                                precedence=False)
+        del self.versions[position]
+        self._texts.discard(text)
+
+    def select(self, spec):
+        """
+        The versions within an `avakas.semver.VersionSpec`, lowest
+        first. The bounds of the spec are found by binary search and
+        only the versions between them are matched against it.
+        """
+        low, high = 0, len(self.versions)
+        for operation, bound in spec.clauses:
+            key = bound.precedence_key()
+            if operation in ('>=', '=='):
+                low = max(low, self._bisect(key))
+            elif operation == '>':
+                low = max(low, self._bisect(key, right=True))
+            if operation in ('<=', '=='):
+                high = min(high, self._bisect(key, right=True))
+            elif operation == '<':
+                high = min(high, self._bisect(key))
+
+        return [self._version(position) for position in range(low, high)
+                if spec.match(self._version(position))]
+
+    def highest_prerelease(self, release, prefix=()):
+        """
+        The highest prerelease of a release whose identifiers are
+        `prefix` followed by a number (i.e. `rc.3` for the `rc` prefix),
+        or None if there are none
+        """
+        lower, upper = prerelease_bounds(release, prefix)
+        start, end = self._bisect(lower), self._bisect(upper)
+        if start == end:
+            return None
+
+        return self._version(end - 1)
+
+    def dump(self):
+        """The index as a JSON friendly list, see `restore`"""
+        return list(self.versions)
+
+    @classmethod
+    def restore(cls, tag_prefix, data):
+        """An index from the output of `dump`"""
+        return cls(tag_prefix=tag_prefix, versions=data)
+
+    def __len__(self):
+        return len(self.versions)
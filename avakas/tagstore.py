@@ -0,0 +1,236 @@
+"""
+Avakas Persistent Tag Index
+
+Keeps the tag refs of a repository, and the version indexes built from
+them, in the git directory between runs. Each run only reads the tag
+refs which were created, moved or deleted since the last one, going by
+the stamps of loose ref files, and only reads every tag again when the
+contents of packed-refs change.
+"""
+
+import json
+import os
+import tempfile
+
+from avakas.refs import TAGS_DIR, file_digest, file_stamp, find_git_dir
+from avakas.tags import TagIndex, VersionIndex, read_tag_refs
+
+STORE_FILENAME = 'avakas-tags'
+STORE_FORMAT = 2
+
+
+class TagStore():
+    """
+    The tag refs of one repository, as a dict of tag name to commit sha,
+    plus one `avakas.tags.TagIndex` and one `avakas.tags.VersionIndex`
+    per tag prefix which are updated in place as tags come and go.
+    Stored as `avakas-tags` in the common git directory, when there is
+    one.
+    """
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, directory, common=None):
+        self.directory = directory
+        self.common = common
+        self.tags = {}
+        self._packed = None
+        self._loose = {}
+        self._indexes = {}
+        self._versions = {}
+        self._dirty = False
+
+    @property
+    def path(self):
+        """Where the store is kept, None outside of a git directory"""
+        if not self.common:
+            return None
+
+        return os.path.join(self.common, STORE_FILENAME)
+
+    @classmethod
+    def for_directory(cls, directory):
+        """
+        The stored tags of the repository containing `directory`, brought
+        up to date with its tag refs
+        """
+        found = find_git_dir(directory)
+        store = cls(directory, common=found[1] if found else None)
+        store.load()
+        return store.sync()
+
+    def load(self):
+        """Read the stored state, starting afresh if it is unreadable"""
+        if not self.path:
+            return
+
+        try:
+            with open(self.path, 'r', encoding='utf8') as handle:
+                data = json.load(handle)
+            if data.get('format') != STORE_FORMAT:
+                return
+            tags = data['tags']
+            indexes = {prefix: TagIndex.restore(prefix, index)
+                       for prefix, index in data['indexes'].items()}
+            versions = {prefix: VersionIndex.restore(prefix, index)
+                        for prefix, index in data['versions'].items()}
+            packed = data['packed']
+            loose = data['loose']
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return
+
+        self.tags = tags
+        self._indexes = indexes
+        self._versions = versions
+        self._packed = packed
+        self._loose = loose
+
+    def _loose_stamps(self):
+        """Stamps of every loose tag ref file, by tag name"""
+        stamps = {}
+        tags_dir = os.path.join(self.common, TAGS_DIR)
+        for root, _dirs, files in os.walk(tags_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                tag = os.path.relpath(path, tags_dir).replace(os.sep, '/')
+                stamps[tag] = file_stamp(path)
+
+        return stamps
+
+    def sync(self):
+        """
+        Bring the stored tags up to date with the tag refs. Stamps are
+        taken before refs are read, so anything which changes while
+        reading is read again next time.
+        """
+        if not self.common:
+            self._update(dict(read_tag_refs(self.directory)), full=True)
+            return self
+
+        packed_path = os.path.join(self.common, 'packed-refs')
+        stamp = file_stamp(packed_path)
+        if self._packed and self._packed[0] == stamp:
+            packed = self._packed
+        else:
+            packed = [stamp, file_digest(packed_path)]
+        loose = self._loose_stamps()
+
+        if not self._packed or packed[1] != self._packed[1]:
+            self._update(dict(read_tag_refs(self.directory)), full=True)
+        else:
+            # a removed loose ref may still be packed, so read those too
+            changed = [tag for tag, tag_stamp in loose.items()
+                       if self._loose.get(tag) != tag_stamp]
+            changed += [tag for tag in self._loose if tag not in loose]
+            current = dict(read_tag_refs(self.directory, names=changed)) \
+                if changed else {}
+            self._update({tag: current.get(tag) for tag in changed})
+
+        if packed != self._packed or loose != self._loose:
+            self._dirty = True
+        self._packed = packed
+        self._loose = loose
+        return self
+
+    def _update(self, updates, full=False):
+        """
+        Apply a dict of tag name to commit sha (None for removed tags)
+        to the stored tags and every index. With `full`, the updates are
+        every tag there is and anything else is removed.
+        """
+        if full:
+            for tag in self.tags:
+                updates.setdefault(tag, None)
+
+        removed_from = set()
+        for tag, commit in updates.items():
+            previous = self.tags.get(tag)
+            if previous == commit:
+                continue
+
+            self._dirty = True
+            if commit is None:
+                del self.tags[tag]
+                for versions in self._versions.values():
+                    versions.remove(tag)
+            else:
+                self.tags[tag] = commit
+                for index in self._indexes.values():
+                    index.add(tag, commit)
+                # moving a tag does not change the versions there are
+                if previous is None:
+                    for versions in self._versions.values():
+                        versions.add(tag)
+            if previous is not None:
+                removed_from.add(previous)
+
+        if removed_from:
+            self._reindex(removed_from)
+
+    def _reindex(self, commits):
+        """
+        Index commits which tags were deleted from or moved off again,
+        from the tags which remain on them
+        """
+        remaining = {commit: [] for commit in commits}
+        for tag, commit in self.tags.items():
+            if commit in remaining:
+                remaining[commit].append(tag)
+
+        for index in self._indexes.values():
+            for commit, tags in remaining.items():
+                index.reindex(commit, tags)
+
+    def add(self, tag, commit):
+        """Record a tag created during this run"""
+        self._update({tag: commit})
+
+    def index(self, tag_prefix=''):
+        """The `avakas.tags.TagIndex` for a tag prefix"""
+        tag_prefix = tag_prefix or ''
+        if tag_prefix not in self._indexes:
+            index = TagIndex(tag_prefix=tag_prefix)
+            for tag, commit in self.tags.items():
+                index.add(tag, commit)
+            self._indexes[tag_prefix] = index
+            self._dirty = True
+
+        return self._indexes[tag_prefix]
+
+    def versions(self, tag_prefix=''):
+        """The `avakas.tags.VersionIndex` for a tag prefix"""
+        tag_prefix = tag_prefix or ''
+        if tag_prefix not in self._versions:
+            self._versions[tag_prefix] = VersionIndex.build(tag_prefix,
+                                                            self.tags)
+            self._dirty = True
+
+        return self._versions[tag_prefix]
+
+    def save(self):
+        """Write the stored state if it changed, atomically"""
+        if not self.path or not self._dirty:
+            return
+
+        data = {'format': STORE_FORMAT,
+                'packed': self._packed,
+                'loose': self._loose,
+                'tags': self.tags,
+                'indexes': {prefix: index.dump()
+                            for prefix, index in self._indexes.items()},
+                'versions': {prefix: versions.dump()
+                             for prefix, versions in self._versions.items()}}
+        try:
+            handle, tmp_path = tempfile.mkstemp(dir=self.common,
+                                                prefix=STORE_FILENAME)
+        except OSError:
+            # like the version cache, this is only an optimization
+            return
+
+        try:
+            with os.fdopen(handle, 'w', encoding='utf8') as tmp_file:
+                # dumps is much faster than dump, which streams in python
+                tmp_file.write(json.dumps(data))
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except OSError:
+            os.unlink(tmp_path)
@@ -0,0 +1,78 @@
+"""
+Avakas Phase Timings
+
+Records the wall time spent in each phase of a run (flavor detection,
+reading, bump determination, writing and the individual git
+operations) for `--timings` and `--profile`. Recording is off unless
+enabled, in which case phases cost a context manager and nothing more.
+"""
+
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Timings():
+    """
+    Accumulated wall time and call count per named phase. Phases may
+    nest, each one is reported with its own total. Safe to record from
+    several threads at once, as batch operations do.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block as (part of) the named phase"""
+        if not self.enabled:
+            yield
+            return
+
+        with self._lock:
+            # phases are reported in the order they were first entered
+            self._phases.setdefault(name, [0, 0.0])
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._phases[name][0] += 1
+                self._phases[name][1] += elapsed
+
+    def reset(self):
+        """Forget everything recorded so far"""
+        with self._lock:
+            self._phases = {}
+
+    def report(self):
+        """The recorded phases as a list of dicts"""
+        with self._lock:
+            return [{'phase': name, 'calls': calls, 'seconds': seconds}
+                    for name, (calls, seconds) in self._phases.items()]
+
+    def print_report(self, stream=None):
+        """Print a breakdown of recorded phases, to stderr by default"""
+        stream = stream or sys.stderr
+        print('avakas timings:', file=stream)
+        for phase in self.report():
+            print(f"  {phase['phase']:<14} {phase['calls']:>4} "
+                  f"{phase['seconds']:10.4f}s", file=stream)
+
+    def write_json(self, path):
+        """Write the recorded phases as JSON"""
+        with open(path, 'w', encoding='utf8') as json_file:
+            json.dump({'phases': self.report()}, json_file, indent=2)
+
+
+TIMINGS = Timings()
+
+
+def timed(name):
+    """Time the enclosed block as the named phase of this run"""
+    return TIMINGS.phase(name)
@@ -2,14 +2,13 @@
 Avakas Utility Functions
 """
 
-import re
+import io
 import sys
 import os
-from functools import cmp_to_key
 import contextlib
-from pkg_resources import resource_string, resource_filename
 
-from semantic_version import compare
+from avakas.semver import sort_versions as semver_sort
+from avakas.version import VERSION
 
 
 @contextlib.contextmanager
@@ -18,46 +17,50 @@ def stdout_redirect():
     # http://marc-abramowitz.com/archives/2013/07/19/python-context-manager-for-redirected-stdout-and-stderr/
     oldstdchannel = None
     try:
-        oldstdchannel = os.dup(sys.stdout.fileno())
-        os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+        stdout_fd = sys.stdout.fileno()
+        stderr_fd = sys.stderr.fileno()
+    except (AttributeError, io.UnsupportedOperation):
+        # already captured in memory (i.e. by the server), nothing to do
+        stdout_fd = None
+
+    try:
+        if stdout_fd is not None:
+            oldstdchannel = os.dup(stdout_fd)
+            os.dup2(stderr_fd, stdout_fd)
 
         yield
     finally:
         if oldstdchannel is not None:
-            os.dup2(oldstdchannel, sys.stdout.fileno())
-
-
-def match_and_rewrite_lines(pattern, file_body, version):
-    """
-    Replace lines by regex
-    """
-    lines = []
-    updated = False
-    for line in file_body.splitlines():
-        re_out = re.sub(pattern, r'\1%s\3', line)
-        if re_out != line:
-            updated = True
-            lines.append(re_out % version)
-        else:
-            lines.append(line)
-
-    return ('\n'.join(lines), updated)
+            os.dup2(oldstdchannel, stdout_fd)
+            os.close(oldstdchannel)
 
 
 def sort_versions(versions):
     """
     Sort a list of version strings by semantic version
     """
-    return sorted(versions, key=cmp_to_key(compare))
+    return semver_sort(versions)
 
 
 def my_version():
     """
     Returns the current version of avakas itself.
     """
-    if os.path.exists(resource_filename(__name__, 'version')):
-        return resource_string(__name__, 'version')
+    if VERSION:
+        return VERSION
+
+    # not generated, so either installed without a build step or
+    # running from a checkout. only now scan installed distributions.
+    try:
+        # pylint: disable=import-outside-toplevel
+        from importlib.metadata import version, PackageNotFoundError
+        try:
+            return version('avakas')
+        except PackageNotFoundError:
+            pass
+    except ImportError:
+        pass
 
-    return open(os.path.join(os.path.dirname(__file__),
-                             "..", "version"),
-                encoding='utf8').read()
+    with open(os.path.join(os.path.dirname(__file__), "..", "version"),
+              encoding='utf8') as version_file:
+        return version_file.read().strip()
@@ -0,0 +1,125 @@
+"""
+Avakas Shared Git State
+"""
+
+import os
+import threading
+
+from avakas.errors import AvakasError
+from avakas.refs import find_git_dir
+from avakas.tagstore import TagStore
+from avakas.timings import timed
+
+
+class Workspace():
+    """
+    Holds the git state shared between projects, so that many projects
+    within the same repository only construct one `git.Repo` and read
+    the tag refs once per run. Every project gets a workspace, by default a
+    private one. Workspaces may be shared between threads, and may
+    outlive a run when `refresh()` is called before each one.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._repos = {}
+        self._tag_stores = {}
+        self._synced = set()
+        self._fetched = set()
+
+    @staticmethod
+    def repo_key(directory):
+        """The git directory a project directory belongs to"""
+        found = find_git_dir(directory)
+        if not found:
+            return os.path.abspath(directory)
+
+        return os.path.abspath(found[0])
+
+    def repo(self, directory):
+        """The `git.Repo` for the repository containing `directory`"""
+        # GitPython is slow to import and not needed to show most versions
+        # pylint: disable=import-outside-toplevel
+        from git import Repo
+
+        key = self.repo_key(directory)
+        with self._lock:
+            if key not in self._repos:
+                with timed('git open'):
+                    repo = Repo(directory, search_parent_directories=True)
+                if not repo:
+                    raise AvakasError(f"Unable to find associated git \
+                    repo for {directory}")
+                self._repos[key] = repo
+
+            return self._repos[key]
+
+    def first_fetch(self, directory, remote, branch):
+        """
+        True the first time a remote branch is fetched for the repository
+        containing `directory`, so each is fetched at most once per run
+        """
+        key = (self.repo_key(directory), remote, branch)
+        with self._lock:
+            if key in self._fetched:
+                return False
+
+            self._fetched.add(key)
+            return True
+
+    def tag_index(self, directory, tag_prefix=''):
+        """
+        The `avakas.tags.TagIndex` for the repository containing
+        `directory`. Tags are kept in an `avakas.tagstore.TagStore`,
+        which is brought up to date once per run by reading only the
+        tag refs which changed since it was last stored.
+        """
+        with self._lock, timed('tags'):
+            store = self._tag_store(directory)
+            index = store.index(tag_prefix)
+            store.save()
+            return index
+
+    def version_index(self, directory, tag_prefix=''):
+        """
+        The `avakas.tags.VersionIndex` of every version tagged in the
+        repository containing `directory`, kept alongside the tag index
+        """
+        with self._lock, timed('tags'):
+            store = self._tag_store(directory)
+            versions = store.versions(tag_prefix)
+            store.save()
+            return versions
+
+    def _tag_store(self, directory):
+        """
+        The `avakas.tagstore.TagStore` for the repository containing
+        `directory`, synced once per run. Called with the lock held.
+        """
+        key = self.repo_key(directory)
+        store = self._tag_stores.get(key)
+        if store is None:
+            store = TagStore.for_directory(directory)
+            self._tag_stores[key] = store
+        elif key not in self._synced:
+            store.sync()
+        self._synced.add(key)
+
+        return store
+
+    def add_tag(self, directory, name, commit):
+        """Record a tag created during this run in the shared indexes"""
+        key = self.repo_key(directory)
+        with self._lock:
+            if key in self._tag_stores:
+                self._tag_stores[key].add(name, commit)
+
+    def refresh(self):
+        """
+        Start a new run with this workspace. Tags are brought up to date
+        again (going by ref file stamps) and remote branches may be
+        fetched again.
+        """
+        with self._lock:
+            self._fetched.clear()
+            self._synced.clear()
@@ -0,0 +1,5 @@
+"""
+Avakas version, replaced by scripts/versiongen at build time
+"""
+
+VERSION = '@@VERSION@@'
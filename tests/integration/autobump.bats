@@ -262,3 +262,59 @@ teardown() {
     local tags=($(git tag -l))
     [ "${tags[-1]}" == "0.0.2" ]
 }
+
+subproject_commit() {
+    local SUBPROJECT="$1"
+    local MSG="$2"
+    mkdir -p "${REPO}/${SUBPROJECT}"
+    echo "some kinda ${RANDOM}" > "${REPO}/${SUBPROJECT}/foo"
+    git -C "$REPO" add "${SUBPROJECT}/foo"
+    git -C "$REPO" commit -qm "$MSG"
+}
+
+@test "autobump a subproject from the commits which change it" {
+    for SUBPROJECT in api web ; do
+        mkdir -p "${REPO}/${SUBPROJECT}"
+        echo -n "1.0.0" > "${REPO}/${SUBPROJECT}/version"
+    done
+    git -C "$REPO" add api/version web/version
+    git -C "$REPO" commit -qm "Version bumped to 1.0.0"
+    subproject_commit web "web thing\nbump:major"
+    subproject_commit api "api thing\nbump:minor"
+    subproject_commit web "web thing"
+    avakas_wrapper bump "${REPO}/api" auto --path-scoped --tag-prefix "api-"
+    [ "$output" == "Version updated from api-1.0.0 to api-1.1.0" ]
+    avakas_wrapper bump "${REPO}/web" auto --path-scoped --tag-prefix "web-"
+    [ "$output" == "Version updated from web-1.0.0 to web-2.0.0" ]
+    subproject_commit web "web thing\nbump:minor"
+    avakas_wrapper bump "${REPO}/api" auto --path-scoped --tag-prefix "api-"
+    [ "$output" == "" ]
+}
+
+@test "autobump takes the highest hint of a message" {
+    commit_message "$REPO" "some thing bump:patch\n#major"
+    avakas_wrapper bump "$REPO" auto
+    [ "$output" == "Version updated from 0.0.1 to 1.0.0" ]
+}
+
+@test "autobump from conventional commits" {
+    commit_message "$REPO" "feat: some thing"
+    avakas_wrapper bump "$REPO" auto
+    [ "$output" == "" ]
+    avakas_wrapper bump "$REPO" auto --bump-hints conventional
+    [ "$output" == "Version updated from 0.0.1 to 0.1.0" ]
+    commit_message "$REPO" "fix(api): some bug"
+    commit_message "$REPO" \
+                   "$(printf 'docs: some words\n\nBREAKING CHANGE: it is different')"
+    commit_message "$REPO" "chore: not this one\nbump:minor"
+    avakas_wrapper bump "$REPO" auto --bump-hints conventional
+    [ "$output" == "Version updated from 0.1.0 to 1.0.0" ]
+    commit_message "$REPO" "fix: some bug"
+    commit_message "$REPO" "chore: and this\nbump:minor"
+    avakas_wrapper bump "$REPO" auto --bump-hints avakas,conventional
+    [ "$output" == "Version updated from 1.0.0 to 1.1.0" ]
+    commit_message "$REPO" "refactor!: everything"
+    avakas_wrapper bump "$REPO" auto --bump-hints conventional
+    [ "$output" == "Version updated from 1.1.0 to 2.0.0" ]
+    avakas_rc 1 bump "$REPO" auto --bump-hints nope
+}
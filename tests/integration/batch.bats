@@ -0,0 +1,79 @@
+#!/usr/bin/env bats
+# -*- mode: Shell-script;bash -*-
+
+load helper
+
+setup() {
+    shared_setup
+    REPO_ORIGIN=$(fake_repo)
+    template_skeleton "$REPO_ORIGIN" plain "0.0.1"
+    origin_repo "$REPO_ORIGIN"
+    REPO=$(clone_repo $REPO_ORIGIN)
+    mkdir -p "${REPO}/first" "${REPO}/second"
+    echo -n "1.0.0" > "${REPO}/first/version"
+    echo -n "2.0.0" > "${REPO}/second/version"
+}
+
+teardown() {
+    shared_teardown
+}
+
+@test "batch show many projects" {
+    avakas_wrapper batch show "$REPO" "${REPO}/first" "${REPO}/second"
+    [ "${#lines[@]}" == "3" ]
+    scan_lines "\"directory\": \"${REPO}\", \"flavor\": \"legacy\", \"version\": \"0.0.1\"" "${lines[0]}"
+    scan_lines "\"version\": \"1.0.0\"" "${lines[1]}"
+    scan_lines "\"version\": \"2.0.0\"" "${lines[2]}"
+}
+
+@test "batch show from a manifest" {
+    printf "# projects\n${REPO}/first\n${REPO}/second\n" > "${REPO}/manifest"
+    avakas_wrapper batch show --manifest "${REPO}/manifest"
+    [ "${#lines[@]}" == "2" ]
+    scan_lines "\"version\": \"1.0.0\"" "${lines[0]}"
+    scan_lines "\"version\": \"2.0.0\"" "${lines[1]}"
+}
+
+@test "batch show reports problems per project" {
+    avakas_rc 1 batch show "${REPO}/first" "${REPO}/nope"
+    scan_lines "\"version\": \"1.0.0\"" "${lines[0]}"
+    scan_lines "\"error\": \"Directory ${REPO}/nope does not exist.\"" "${lines[1]}"
+}
+
+@test "batch show reports unexpected problems per project" {
+    mkdir -p "${REPO}/empty"
+    avakas_rc 1 batch show "${REPO}/first" "${REPO}/empty" "${REPO}/second"
+    [ "${#lines[@]}" == "3" ]
+    scan_lines "\"version\": \"1.0.0\"" "${lines[0]}"
+    scan_lines "\"directory\": \"${REPO}/empty\", \"error\": " "${lines[1]}"
+    scan_lines "\"version\": \"2.0.0\"" "${lines[2]}"
+}
+
+@test "batch bump refuses a version another project already tagged" {
+    mkdir -p "${REPO}/third"
+    echo -n "1.0.0" > "${REPO}/third/version"
+    avakas_rc 1 batch bump patch "${REPO}/first" "${REPO}/third"
+    scan_lines "\"version\": \"1.0.1\", \"bumped\": true" "${lines[0]}"
+    scan_lines "\"error\": \"Version 1.0.1 is already tagged\"" "${lines[1]}"
+    [ "$(git -C "$REPO" log --oneline --grep 'Version bumped' | wc -l)" == "1" ]
+    [ "$(cat "${REPO}/third/version")" == "1.0.0" ]
+}
+
+@test "batch bump git-native projects" {
+    avakas_wrapper batch bump patch "$REPO" --flavor git-native
+    scan_lines "\"previous\": \"0.0.1\", \"version\": \"0.0.2\", \"bumped\": true" "${lines[0]}"
+    avakas_wrapper show "$REPO" --flavor git-native
+    [ "$output" == "0.0.2" ]
+}
+
+@test "batch show with concurrent jobs keeps the project order" {
+    for n in 3 4 5 6 7 8 ; do
+        mkdir -p "${REPO}/p${n}"
+        echo -n "${n}.0.0" > "${REPO}/p${n}/version"
+    done
+    avakas_wrapper batch show --jobs 4 "${REPO}"/p{3,4,5,6,7,8}
+    [ "${#lines[@]}" == "6" ]
+    for n in 3 4 5 6 7 8 ; do
+        scan_lines "\"version\": \"${n}.0.0\"" "${lines[$((n - 3))]}"
+    done
+}
@@ -0,0 +1,36 @@
+#!/usr/bin/env bats
+# -*- mode: Shell-script;bash -*-
+
+load helper
+
+setup() {
+    shared_setup
+}
+
+teardown() {
+    shared_teardown
+}
+
+benchmark() {
+    run python "${CIDIR}/scripts/benchmark" --commits 50 --tags 5 --tail 5 \
+        --repeat 1 --workdir "${AVAKAS_TEST_DIR}/bench" "$@"
+    if [ "$status" != 0 ] ; then
+        echo "$output"
+    fi
+    [ "$status" == 0 ]
+}
+
+@test "benchmark writes comparable results" {
+    benchmark --output "${AVAKAS_TEST_DIR}/first.json"
+    python -c "
+import json, sys
+results = json.load(open(sys.argv[1]))
+measured = results['runs'][0]['results']
+assert len(measured) == 24
+assert not [r for r in measured if 'error' in r], measured
+" "${AVAKAS_TEST_DIR}/first.json"
+    benchmark --output "${AVAKAS_TEST_DIR}/second.json" \
+              --flavors git-native --operations show \
+              --compare "${AVAKAS_TEST_DIR}/first.json"
+    scan_lines "50 commits 5 tags git-native show: .*x)" "${lines[@]}"
+}
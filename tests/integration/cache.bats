@@ -0,0 +1,75 @@
+#!/usr/bin/env bats
+# -*- mode: Shell-script;bash -*-
+
+load helper
+
+setup() {
+    shared_setup
+    REPO_ORIGIN=$(fake_repo)
+    template_skeleton "$REPO_ORIGIN" plain "0.0.1"
+    origin_repo "$REPO_ORIGIN"
+    REPO=$(clone_repo $REPO_ORIGIN)
+}
+
+teardown() {
+    shared_teardown
+}
+
+@test "show populates the version cache" {
+    avakas_wrapper show "$REPO" --flavor "git-native"
+    [ "$output" == "0.0.1" ]
+    [ -e "$REPO/.git/avakas-cache" ]
+    avakas_wrapper show "$REPO" --flavor "git-native"
+    [ "$output" == "0.0.1" ]
+}
+
+@test "a new tag invalidates the version cache" {
+    avakas_wrapper show "$REPO" --flavor "git-native"
+    [ "$output" == "0.0.1" ]
+    commit_message "$REPO" "whorp"
+    tag_repo "$REPO" "0.0.2" "latest"
+    avakas_wrapper show "$REPO" --flavor "git-native"
+    [ "$output" == "0.0.2" ]
+}
+
+@test "a changed version file invalidates the version cache" {
+    avakas_wrapper show "$REPO"
+    [ "$output" == "0.0.1" ]
+    echo -n "0.0.3" > "${REPO}/version"
+    avakas_wrapper show "$REPO"
+    [ "$output" == "0.0.3" ]
+}
+
+@test "show without the version cache" {
+    avakas_wrapper show "$REPO" --no-cache
+    [ "$output" == "0.0.1" ]
+    [ ! -e "$REPO/.git/avakas-cache" ]
+}
+
+@test "the tag index follows tags between runs" {
+    avakas_wrapper show "$REPO" --flavor "git-native" --no-cache
+    [ "$output" == "0.0.1" ]
+    [ -e "$REPO/.git/avakas-tags" ]
+    commit_message "$REPO" "whorp"
+    tag_repo "$REPO" "0.0.2" "latest"
+    avakas_wrapper show "$REPO" --flavor "git-native" --no-cache
+    [ "$output" == "0.0.2" ]
+    git -C "$REPO" pack-refs --all
+    avakas_wrapper show "$REPO" --flavor "git-native" --no-cache
+    [ "$output" == "0.0.2" ]
+    git -C "$REPO" tag -d "0.0.2"
+    avakas_wrapper show "$REPO" --flavor "git-native" --no-cache
+    [ "$output" == "0.0.1" ]
+    git -C "$REPO" tag -f "0.0.1" HEAD
+    avakas_wrapper bump "$REPO" patch --flavor "git-native" --dry-run
+    scan_lines "Version updated from 0.0.1 to 0.0.2" "${lines[@]}"
+}
+
+@test "an unreadable tag index is rebuilt" {
+    avakas_wrapper show "$REPO" --flavor "git-native" --no-cache
+    echo "whorp" > "$REPO/.git/avakas-tags"
+    commit_message "$REPO" "whorp"
+    tag_repo "$REPO" "0.0.2" "latest"
+    avakas_wrapper show "$REPO" --flavor "git-native" --no-cache
+    [ "$output" == "0.0.2" ]
+}
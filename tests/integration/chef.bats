@@ -35,3 +35,12 @@ teardown() {
     scan_lines "0.0.2" "${lines[@]}"
     [ -e "$REPO/version" ]
 }
+
+@test "bump a cookbook version, leaving the rest of metadata.rb alone" {
+    chmod 0640 "$REPO/metadata.rb"
+    avakas_wrapper bump "$REPO" patch --skip-dirty
+    sed -e "s/@@VSN@@/0.0.2/" < "${BATS_TEST_DIRNAME}/fixtures/metadata.rb" \
+        | cmp - "${REPO}/metadata.rb"
+    [ "$(stat -c %a "$REPO/metadata.rb")" == "640" ]
+    [ -z "$(ls -A "$REPO" | grep avakas)" ]
+}
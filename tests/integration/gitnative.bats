@@ -29,6 +29,33 @@ teardown() {
     [ -e "$REPO/version" ]
 }
 
+@test "show a git-native version from an annotated tag" {
+    commit_message "$REPO" "whorp"
+    cd "$REPO"
+    git tag -a -m "release 0.1.0" "0.1.0"
+    avakas_wrapper show "$REPO" --flavor="git-native"
+    [ "$output" == "0.1.0" ]
+}
+
+@test "show the highest git-native version on a commit" {
+    commit_message "$REPO" "whorp"
+    tag_repo "$REPO" "0.2.0" "latest"
+    tag_repo "$REPO" "0.10.0" "latest"
+    tag_repo "$REPO" "0.3.0-alpha.1" "latest"
+    avakas_wrapper show "$REPO" --flavor="git-native"
+    [ "$output" == "0.10.0" ]
+}
+
+@test "show the highest git-native prerelease on a commit" {
+    commit_message "$REPO" "whorp"
+    tag_repo "$REPO" "0.2.0-rc.2" "latest"
+    tag_repo "$REPO" "0.2.0-rc.10" "latest"
+    tag_repo "$REPO" "0.2.0-rc.10.1" "latest"
+    tag_repo "$REPO" "0.1.10" "latest"
+    avakas_wrapper show "$REPO" --flavor="git-native" --no-cache
+    [ "$output" == "0.2.0-rc.10.1" ]
+}
+
 @test "ignore non-version tags on autobump" {
     avakas_wrapper  set "$REPO" --flavor "git-native" "1.0.0"
 
@@ -214,3 +241,186 @@ teardown() {
     avakas_wrapper show "$REPO" --flavor "git-native" --tag-prefix 'v'
     [ "$output" == "v1.1.0-beta.1" ]
 }
+
+@test "show a git-native version using a commit-graph" {
+    commit_message "$REPO" "whorp"
+    tag_repo "$REPO" "0.1.0" "latest"
+    commit_message "$REPO" "whorp"
+    tag_repo "$REPO" "not-a-version" "latest"
+    commit_message "$REPO" "whorp"
+    tag_repo "$REPO" "v0.2.0" "latest"
+    commit_message "$REPO" "whorp"
+    git -C "$REPO" commit-graph write --reachable
+    avakas_wrapper show "$REPO" --flavor "git-native" --no-cache
+    [ "$output" == "0.1.0" ]
+    avakas_wrapper show "$REPO" --flavor "git-native" --no-cache \
+                   --tag-prefix "v"
+    [ "$output" == "v0.2.0" ]
+    avakas_wrapper bump "$REPO" patch --flavor "git-native"
+    [ "$output" == "Version updated from 0.1.0 to 0.1.1" ]
+}
+
+dated_commit() {
+    local FILE="${3:-$REPO}/dated-${RANDOM}"
+    echo "some kinda ${RANDOM}" > "$FILE"
+    git -C "$REPO" add "$FILE"
+    GIT_COMMITTER_DATE="$2" git -C "$REPO" commit -q -m "$1"
+}
+
+@test "show the same git-native version across a merge using a commit-graph" {
+    # the prerelease is newer than the release, but further back from the
+    # merge than a git log walk goes before reaching the release
+    git -C "$REPO" checkout -q -b side
+    dated_commit "side" "2020-03-01T00:00:00"
+    tag_repo "$REPO" "0.3.0-rc.1" "latest"
+    dated_commit "side tip" "2020-01-15T00:00:00"
+    git -C "$REPO" checkout -q mainline
+    dated_commit "main" "2020-02-01T00:00:00"
+    tag_repo "$REPO" "0.2.0" "latest"
+    dated_commit "more main" "2020-02-02T00:00:00"
+    GIT_COMMITTER_DATE="2020-02-03T00:00:00" \
+                      git -C "$REPO" merge -q --no-ff --no-edit side
+    avakas_wrapper show "$REPO" --flavor "git-native" --no-cache
+    [ "$output" == "0.2.0" ]
+    git -C "$REPO" commit-graph write --reachable
+    avakas_wrapper show "$REPO" --flavor "git-native" --no-cache
+    [ "$output" == "0.2.0" ]
+    avakas_wrapper bump "$REPO" patch --flavor "git-native"
+    [ "$output" == "Version updated from 0.2.0 to 0.2.1" ]
+}
+
+@test "no git-native version using a commit-graph" {
+    commit_message "$REPO" "whorp"
+    git -C "$REPO" commit-graph write --reachable
+    avakas_rc 1 show "$REPO" --flavor "git-native" --no-cache \
+              --tag-prefix "v"
+}
+
+shallow_history() {
+    for n in $(seq 1 20) ; do
+        commit_message "$REPO" "whorp ${n}"
+    done
+    tag_repo "$REPO" "0.1.0" "latest"
+    for n in $(seq 1 30) ; do
+        commit_message "$REPO" "whorp ${n}"
+    done
+}
+
+shallow_clone() {
+    git -C "$REPO" push -q --tags origin mainline
+    SHALLOW="${AVAKAS_TEST_DIR}/shallow-${RANDOM}"
+    git clone -q --no-tags --depth 1 "file://${REPO_ORIGIN}" "$SHALLOW"
+    config_repo "$SHALLOW"
+}
+
+@test "show a git-native version from a shallow clone by deepening it" {
+    shallow_history
+    shallow_clone
+    avakas_rc 1 show "$SHALLOW" --flavor "git-native" --no-cache
+    cd "$CIDIR"
+    run coverage run -a --source "avakas" -m "avakas" \
+        show "$SHALLOW" --flavor "git-native" --no-cache --deepen
+    [ "$status" -eq 0 ]
+    scan_lines "^0.1.0$" "${lines[@]}"
+    scan_lines "^Deepened shallow clone by 48 commits and 1 tags, with 4 round trips receiving [0-9]+ bytes$" "${lines[@]}"
+    [ -f "${SHALLOW}/.git/shallow" ]
+    avakas_wrapper show "$SHALLOW" --flavor "git-native" --no-cache --deepen
+    [ "$output" == "0.1.0" ]
+}
+
+@test "autobump a shallow clone deepens back to the last release" {
+    shallow_history
+    cd "$REPO"
+    git tag "0.2.0-1"
+    commit_message "$REPO" "bump:minor"
+    shallow_clone
+    avakas_wrapper bump "$SHALLOW" auto --flavor "git-native" --deepen
+    scan_lines "^Version updated from 0.2.0-1 to 0.2.0$" "${lines[@]}"
+    git -C "$SHALLOW" rev-parse --verify -q "0.1.0"
+}
+
+@test "autobump git-native subprojects with their own tag prefixes" {
+    mkdir -p "${REPO}/api" "${REPO}/web"
+    commit_message "${REPO}/api" "api thing"
+    commit_message "${REPO}/web" "web thing"
+    tag_repo "$REPO" "api-1.0.0" "latest"
+    tag_repo "$REPO" "web-1.0.0" "latest"
+    commit_message "${REPO}/web" "web thing\nbump:major"
+    commit_message "${REPO}/api" "api thing\nbump:patch"
+    commit_message "$REPO" "top thing\nbump:minor"
+    git -C "$REPO" commit-graph write --reachable --changed-paths
+    avakas_wrapper bump "${REPO}/api" auto --flavor "git-native" \
+                   --tag-prefix "api-" --path-scoped
+    [ "$output" == "Version updated from api-1.0.0 to api-1.0.1" ]
+    avakas_wrapper bump "${REPO}/web" auto --flavor "git-native" \
+                   --tag-prefix "web-" --path-scoped
+    [ "$output" == "Version updated from web-1.0.0 to web-2.0.0" ]
+    avakas_wrapper bump "${REPO}/api" auto --flavor "git-native" \
+                   --tag-prefix "api-" --path-scoped
+    [ "$output" == "" ]
+}
+
+@test "autobump a git-native subproject across a merge" {
+    mkdir -p "${REPO}/api"
+    dated_commit "api thing" "2020-01-10T00:00:00" "${REPO}/api"
+    git -C "$REPO" checkout -q -b side
+    dated_commit "side" "2020-03-01T00:00:00"
+    tag_repo "$REPO" "1.1.0-rc.1" "latest"
+    dated_commit "side tip" "2020-01-15T00:00:00"
+    git -C "$REPO" checkout -q mainline
+    dated_commit "main" "2020-02-01T00:00:00"
+    tag_repo "$REPO" "1.0.0" "latest"
+    dated_commit "api thing bump:patch" "2020-02-02T00:00:00" "${REPO}/api"
+    GIT_COMMITTER_DATE="2020-02-03T00:00:00" \
+                      git -C "$REPO" merge -q --no-ff --no-edit side
+    avakas_wrapper show "$REPO" --flavor "git-native" --no-cache
+    [ "$output" == "1.0.0" ]
+    avakas_wrapper bump "${REPO}/api" auto --flavor "git-native" \
+                   --path-scoped
+    [ "$output" == "Version updated from 1.0.0 to 1.0.1" ]
+}
+
+@test "autobump git-native versions from conventional commits" {
+    commit_message "$REPO" "feat(ui)!: a breaking feature"
+    commit_message "$REPO" "fix: some bug"
+    tag_repo "$REPO" "0.2.0-1" "latest"
+    commit_message "$REPO" "feat: some thing"
+    avakas_wrapper bump "$REPO" auto --flavor "git-native" \
+                   --bump-hints conventional
+    [ "$output" == "Version updated from 0.2.0-1 to 1.0.0" ]
+}
+
+@test "show the nearest versions of many commits" {
+    FIRST=$(git -C "$REPO" rev-parse HEAD)
+    commit_message "$REPO" "whorp"
+    SECOND=$(git -C "$REPO" rev-parse HEAD)
+    tag_repo "$REPO" "0.2.0" "latest"
+    tag_repo "$REPO" "v9.0.0" "latest"
+    commit_message "$REPO" "whorp"
+    git -C "$REPO" checkout -q -b feature "$FIRST"
+    git -C "$REPO" commit -q --allow-empty -m "whorp"
+    tag_repo "$REPO" "0.1.5" "latest"
+    git -C "$REPO" commit -q --allow-empty -m "whorp"
+    git -C "$REPO" checkout -q mainline
+    git -C "$REPO" merge -q --no-edit feature
+    MERGE=$(git -C "$REPO" rev-parse HEAD)
+    printf "${SECOND}\n\nmainline~1\n${FIRST}\n" > "${AVAKAS_TEST_DIR}/commits"
+    cd "$CIDIR"
+    run coverage run -a --source "avakas" -m "avakas" \
+        show "$REPO" --at - --at "$MERGE" < "${AVAKAS_TEST_DIR}/commits"
+    [ "$status" -eq 0 ]
+    [ "${#lines[@]}" == "4" ]
+    scan_lines "\"commit\": \"${SECOND}\", \"sha\": \"${SECOND}\", \"version\": \"0.2.0\", \"distance\": 0" "${lines[0]}"
+    scan_lines "\"commit\": \"mainline~1\", .+\"version\": \"0.2.0\", \"distance\": 1" "${lines[1]}"
+    scan_lines "\"sha\": \"${FIRST}\", \"version\": \"0.0.1\", \"distance\": 0" "${lines[2]}"
+    # as near on both sides of the merge, so the highest
+    scan_lines "\"version\": \"0.2.0\", \"distance\": 2" "${lines[3]}"
+    avakas_wrapper show "$REPO" --at "$SECOND" --tag-prefix "v"
+    scan_lines "\"version\": \"v9.0.0\", \"distance\": 0" "${lines[0]}"
+}
+
+@test "show the nearest versions of unknown commits" {
+    avakas_rc 1 show "$REPO" --at HEAD --at nope
+    scan_lines "\"commit\": \"HEAD\", .+\"version\": \"0.0.1\"" "${lines[0]}"
+    scan_lines "\"commit\": \"nope\", \"error\": \"Unknown commit nope\"" "${lines[1]}"
+}
@@ -149,6 +149,16 @@ cookbook_version() {
     tag_repo "$REPO" "$VSN"
 }
 
+node_version() {
+    local REPO="$1"
+    local VSN="$2"
+    sed -e "s/@@VSN@@/${VSN}/" < "${BATS_TEST_DIRNAME}/fixtures/package.json" > "${REPO}/package.json"
+    cd "$REPO"
+    git add package.json
+    git commit -qm "This is an important skeleton" package.json
+    tag_repo "$REPO" "$VSN"
+}
+
 avakas_wrapper() {
     avakas_rc 0 $*
 }
@@ -174,6 +184,8 @@ template_skeleton() {
         ansible_version "$REPO" "$VSN"
     elif [ "$FLAVOR" == "cookbook" ] ; then
         cookbook_version "$REPO" "$VSN"
+    elif [ "$FLAVOR" == "node" ] ; then
+        node_version "$REPO" "$VSN"
     else
         echo "Invalid skeleton!"
         exit 1
@@ -0,0 +1,86 @@
+#!/usr/bin/env bats
+# -*- mode: Shell-script;bash -*-
+
+load helper
+
+setup() {
+    shared_setup
+    FIRST_ORIGIN=$(fake_repo)
+    template_skeleton "$FIRST_ORIGIN" plain "0.0.1"
+    origin_repo "$FIRST_ORIGIN"
+    FIRST=$(clone_repo $FIRST_ORIGIN)
+    SECOND_ORIGIN=$(fake_repo)
+    template_skeleton "$SECOND_ORIGIN" plain "1.2.0"
+    origin_repo "$SECOND_ORIGIN"
+    SECOND=$(clone_repo $SECOND_ORIGIN)
+    REPOS="${AVAKAS_TEST_DIR}/repos.txt"
+    printf "# release train\n${FIRST}\n${SECOND}\n" > "$REPOS"
+}
+
+teardown() {
+    shared_teardown
+}
+
+@test "bump many repositories and push each of them" {
+    avakas_wrapper bump --multi "$REPOS" patch --concurrency 2
+    [ "${#lines[@]}" == "2" ]
+    scan_lines "\"directory\": \"${FIRST}\", \"flavor\": \"legacy\", \"previous\": \"0.0.1\", \"version\": \"0.0.2\", \"bumped\": true, \"pushed\": true" "${lines[0]}"
+    scan_lines "\"directory\": \"${SECOND}\", .+\"version\": \"1.2.1\", \"bumped\": true, \"pushed\": true" "${lines[1]}"
+    [ "$(git -C "$FIRST_ORIGIN" rev-parse mainline)" == \
+      "$(git -C "$FIRST" rev-parse HEAD)" ]
+    [ "$(git -C "$FIRST_ORIGIN" rev-parse '0.0.2^{commit}')" == \
+      "$(git -C "$FIRST" rev-parse HEAD)" ]
+    [ "$(git -C "$SECOND_ORIGIN" rev-parse '1.2.1^{commit}')" == \
+      "$(git -C "$SECOND" rev-parse HEAD)" ]
+}
+
+@test "bump many repositories pulls new commits first" {
+    OTHER=$(clone_repo "$SECOND_ORIGIN")
+    commit_message "$OTHER" "elsewhere"
+    git -C "$OTHER" push -q origin mainline
+    avakas_wrapper bump --multi "$REPOS" minor
+    scan_lines "\"version\": \"1.3.0\", \"bumped\": true, \"pushed\": true" "${lines[1]}"
+    git -C "$SECOND_ORIGIN" log --format=%s mainline | grep -q elsewhere
+    [ "$(git -C "$SECOND_ORIGIN" rev-parse mainline)" == \
+      "$(git -C "$SECOND" rev-parse HEAD)" ]
+}
+
+@test "bump many repositories reports problems per repository" {
+    HOOK="${FIRST_ORIGIN}/.git/hooks/pre-receive"
+    printf '#!/bin/sh\nexit 1\n' > "$HOOK"
+    chmod +x "$HOOK"
+    echo "${AVAKAS_TEST_DIR}/nope" >> "$REPOS"
+    avakas_rc 1 bump --multi "$REPOS" patch
+    [ "${#lines[@]}" == "3" ]
+    scan_lines "\"directory\": \"${FIRST}\", .+\"error\": \"git push failed" "${lines[0]}"
+    scan_lines "\"version\": \"1.2.1\", \"bumped\": true, \"pushed\": true" "${lines[1]}"
+    scan_lines "\"error\": \"Directory ${AVAKAS_TEST_DIR}/nope does not exist.\"" "${lines[2]}"
+    run git -C "$FIRST_ORIGIN" rev-parse --verify -q 0.0.2
+    [ "$status" -ne 0 ]
+}
+
+@test "bump many repositories reports broken repositories" {
+    BROKEN="${AVAKAS_TEST_DIR}/broken"
+    mkdir -p "$BROKEN"
+    echo "0.0.1" > "${BROKEN}/version"
+    printf "${FIRST}\n${BROKEN}\n${SECOND}\n" > "$REPOS"
+    avakas_rc 1 bump --multi "$REPOS" patch
+    [ "${#lines[@]}" == "3" ]
+    scan_lines "\"version\": \"0.0.2\", \"bumped\": true, \"pushed\": true" "${lines[0]}"
+    scan_lines "\"directory\": \"${BROKEN}\", \"error\": " "${lines[1]}"
+    scan_lines "\"version\": \"1.2.1\", \"bumped\": true, \"pushed\": true" "${lines[2]}"
+}
+
+@test "bump many git-native repositories pushes only tags" {
+    FIRST_REV=$(git -C "$FIRST_ORIGIN" rev-parse mainline)
+    avakas_wrapper bump --multi "$REPOS" patch --flavor git-native
+    scan_lines "\"flavor\": \"git-native\", \"previous\": \"0.0.1\", \"version\": \"0.0.2\", \"bumped\": true, \"pushed\": true" "${lines[0]}"
+    [ "$(git -C "$FIRST_ORIGIN" rev-parse '0.0.2^{commit}')" == "$FIRST_REV" ]
+    [ "$(git -C "$FIRST_ORIGIN" rev-parse mainline)" == "$FIRST_REV" ]
+    git -C "$SECOND_ORIGIN" rev-parse --verify -q 1.2.1
+}
+
+@test "bump takes either a directory or --multi" {
+    avakas_rc 2 bump patch
+    avakas_rc 2 bump "$FIRST" patch --multi "$REPOS"
+}
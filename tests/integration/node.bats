@@ -0,0 +1,37 @@
+#!/usr/bin/env bats
+# -*- mode: Shell-script;bash -*-
+
+load helper
+
+setup() {
+    shared_setup
+    REPO_ORIGIN=$(fake_repo)
+    template_skeleton "$REPO_ORIGIN" node "0.0.1"
+    origin_repo "$REPO_ORIGIN"
+    REPO=$(clone_repo $REPO_ORIGIN)
+}
+
+teardown() {
+    shared_teardown
+}
+
+@test "show a node version" {
+    avakas_wrapper show "$REPO" --flavor node
+    [ "$output" == "0.0.1" ]
+}
+
+@test "set a node version, leaving the rest of package.json alone" {
+    avakas_wrapper set "$REPO" "0.0.2" --flavor node --tag-prefix=
+    scan_lines "Version set to 0.0.2" "${lines[@]}"
+    sed -e "s/@@VSN@@/0.0.2/" < "${BATS_TEST_DIRNAME}/fixtures/package.json" \
+        | cmp - "${REPO}/package.json"
+    avakas_wrapper show "$REPO" --flavor node --tag-prefix=
+    [ "$output" == "0.0.2" ]
+}
+
+@test "bump a node version" {
+    avakas_wrapper bump "$REPO" minor --flavor node --tag-prefix=
+    scan_lines "Version updated from 0.0.1 to 0.1.0" "${lines[@]}"
+    grep -q '"version": "0.1.0",' "${REPO}/package.json"
+    grep -q '"engines": {"version": "9.9.9"' "${REPO}/package.json"
+}
@@ -34,6 +34,18 @@ teardown() {
     [ "$output" == "0.0.2" ]
 }
 
+@test "bump a plain version given relative to another directory" {
+    # avakas runs from $CIDIR, which is outside the repository
+    RELATIVE=$(python -c 'import os, sys; print(os.path.relpath(*sys.argv[1:]))' \
+                      "$REPO" "$CIDIR")
+    avakas_wrapper bump "$RELATIVE" patch
+    scan_lines "Version updated from 0.0.1 to 0.0.2" "${lines[@]}"
+    [ "$(git -C "$REPO" log -1 --format=%s)" == "Version bumped to 0.0.2" ]
+    [ -z "$(git -C "$REPO" status --porcelain)" ]
+    [ "$(git -C "$REPO_ORIGIN" rev-parse '0.0.2^{commit}')" == \
+      "$(git -C "$REPO" rev-parse HEAD)" ]
+}
+
 @test "bump a plain version - patch to minor" {
     avakas_wrapper bump "$REPO" minor
     scan_lines "Version updated from 0.0.1 to 0.1.0" "${lines[@]}"
@@ -61,3 +73,57 @@ teardown() {
     avakas_wrapper show "$REPO" --filename "foo"
     [ "$output" == "0.0.3" ]
 }
+
+@test "bump pushes the version commit and tag together" {
+    avakas_wrapper bump "$REPO" patch
+    [ "$(git -C "$REPO_ORIGIN" rev-parse mainline)" == \
+      "$(git -C "$REPO" rev-parse HEAD)" ]
+    [ "$(git -C "$REPO_ORIGIN" rev-parse '0.0.2^{commit}')" == \
+      "$(git -C "$REPO" rev-parse HEAD)" ]
+}
+
+@test "a rejected tag push does not push the version commit" {
+    ORIGIN_REV=$(git -C "$REPO_ORIGIN" rev-parse mainline)
+    HOOK="${REPO_ORIGIN}/.git/hooks/pre-receive"
+    printf '#!/bin/sh\ngrep -q refs/tags/ && exit 1\nexit 0\n' > "$HOOK"
+    chmod +x "$HOOK"
+    avakas_rc 1 bump "$REPO" patch
+    [ "$(git -C "$REPO_ORIGIN" rev-parse mainline)" == "$ORIGIN_REV" ]
+}
+
+@test "bump pulls new commits from the remote" {
+    OTHER=$(clone_repo "$REPO_ORIGIN")
+    commit_message "$OTHER" "elsewhere"
+    git -C "$OTHER" push -q origin mainline
+    avakas_wrapper bump "$REPO" patch
+    scan_lines "Version updated from 0.0.1 to 0.0.2" "${lines[@]}"
+    git -C "$REPO" log --format=%s | grep -q elsewhere
+}
+
+@test "bump does not pull when the remote has nothing new" {
+    cd "$CIDIR"
+    run coverage run -a --source "avakas" -m "avakas" \
+        bump "$REPO" patch --timings
+    [ "$status" -eq 0 ]
+    scan_lines " +git ls-remote +1 .+" "${lines[@]}"
+    run scan_lines " +git pull .+" "${lines[@]}"
+    [ "$status" -eq 1 ]
+}
+
+@test "bump pulls once with --fetch always" {
+    cd "$CIDIR"
+    run coverage run -a --source "avakas" -m "avakas" \
+        bump "$REPO" auto --default-bump patch --fetch always --timings
+    [ "$status" -eq 0 ]
+    scan_lines " +git pull +1 .+" "${lines[@]}"
+}
+
+@test "bump does not pull with --fetch never" {
+    OTHER=$(clone_repo "$REPO_ORIGIN")
+    commit_message "$OTHER" "elsewhere"
+    git -C "$OTHER" push -q origin mainline
+    avakas_rc 1 bump "$REPO" patch --fetch never
+    run git -C "$REPO" log --format=%s
+    run scan_lines "elsewhere" "${lines[@]}"
+    [ "$status" -eq 1 ]
+}
@@ -238,3 +238,14 @@ teardown() {
     avakas_wrapper show "$REPO"
     [ "$output" == "0.0.1-rc.1" ]
 }
+
+@test "bump a prerelease past those already tagged" {
+    tag_repo "$REPO" "0.0.1-rc.1"
+    tag_repo "$REPO" "0.0.1-rc.3"
+    avakas_wrapper bump "$REPO" patch --prerelease --prerelease-prefix rc
+    avakas_wrapper show "$REPO"
+    [ "$output" == "0.0.1-rc.4" ]
+    avakas_wrapper bump "$REPO" patch --prerelease --prerelease-prefix beta
+    avakas_wrapper show "$REPO"
+    [ "$output" == "0.0.1-beta.1" ]
+}
@@ -0,0 +1,69 @@
+#!/usr/bin/env bats
+# -*- mode: Shell-script;bash -*-
+
+load helper
+
+setup() {
+    shared_setup
+    REPO=$(fake_repo)
+    for TAG in 1.0.0 1.2.0 1.9.0-rc.1 1.9.0 2.0.0-rc.1 2.0.0-rc.2 2.0.0 ; do
+        tag_repo "$REPO" "$TAG"
+    done
+}
+
+teardown() {
+    shared_teardown
+}
+
+@test "query the versions within a range" {
+    avakas_wrapper query ">=1.2,<2" "$REPO"
+    [ "${#lines[@]}" == "2" ]
+    [ "${lines[0]}" == "1.2.0" ]
+    [ "${lines[1]}" == "1.9.0" ]
+}
+
+@test "query the latest version matching a spec" {
+    avakas_wrapper query --latest "^1" "$REPO"
+    [ "$output" == "1.9.0" ]
+    tag_repo "$REPO" "v3.1.0"
+    avakas_wrapper query --latest --tag-prefix v ">=3" "$REPO"
+    [ "$output" == "v3.1.0" ]
+}
+
+@test "query the prereleases of a release" {
+    avakas_wrapper query ">=2.0.0-0,<2.0.0" "$REPO"
+    [ "${#lines[@]}" == "2" ]
+    [ "${lines[0]}" == "2.0.0-rc.1" ]
+    [ "${lines[1]}" == "2.0.0-rc.2" ]
+}
+
+@test "query caret and tilde ranges from a prerelease" {
+    tag_repo "$REPO" "1.0.0-rc.1"
+    avakas_wrapper query "^1.0.0-rc.1" "$REPO"
+    [ "${#lines[@]}" == "4" ]
+    [ "${lines[0]}" == "1.0.0-rc.1" ]
+    [ "${lines[1]}" == "1.0.0" ]
+    [ "${lines[3]}" == "1.9.0" ]
+    avakas_wrapper query "^2.0.0-rc.2" "$REPO"
+    [ "${#lines[@]}" == "2" ]
+    [ "${lines[0]}" == "2.0.0-rc.2" ]
+    [ "${lines[1]}" == "2.0.0" ]
+    avakas_wrapper query "~1.9.0-rc.1" "$REPO"
+    [ "${#lines[@]}" == "2" ]
+    [ "${lines[0]}" == "1.9.0-rc.1" ]
+    [ "${lines[1]}" == "1.9.0" ]
+}
+
+@test "query versions tagged and deleted since the last query" {
+    avakas_wrapper query "~1.2" "$REPO"
+    [ "$output" == "1.2.0" ]
+    tag_repo "$REPO" "1.2.7"
+    git -C "$REPO" tag -d 1.2.0
+    avakas_wrapper query "~1.2" "$REPO"
+    [ "$output" == "1.2.7" ]
+}
+
+@test "query without a matching version" {
+    avakas_rc 1 query ">=3" "$REPO"
+    avakas_rc 1 query "not-a-spec" "$REPO"
+}
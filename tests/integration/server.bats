@@ -0,0 +1,96 @@
+#!/usr/bin/env bats
+# -*- mode: Shell-script;bash -*-
+
+load helper
+
+setup() {
+    shared_setup
+    REPO_ORIGIN=$(fake_repo)
+    template_skeleton "$REPO_ORIGIN" plain "0.0.1"
+    origin_repo "$REPO_ORIGIN"
+    REPO=$(clone_repo $REPO_ORIGIN)
+    SOCK="${AVAKAS_TEST_DIR}/avakas.sock"
+}
+
+teardown() {
+    if [ -n "$SERVER_PID" ] ; then
+        kill "$SERVER_PID" || true
+        wait "$SERVER_PID" || true
+    fi
+    shared_teardown
+}
+
+start_server() {
+    cd "$CIDIR"
+    python -m avakas serve "$SOCK" 3>&- 2> /dev/null &
+    SERVER_PID=$!
+    for _ in $(seq 50) ; do
+        [ -S "$SOCK" ] && return 0
+        sleep 0.1
+    done
+    return 1
+}
+
+@test "show through the server notices new tags" {
+    start_server
+    avakas_wrapper --socket "$SOCK" show "$REPO" --flavor git-native
+    [ "$output" == "0.0.1" ]
+    commit_message "$REPO" "whorp"
+    tag_repo "$REPO" "0.0.2" "latest"
+    avakas_wrapper --socket "$SOCK" show "$REPO" --flavor git-native \
+                   --no-cache
+    [ "$output" == "0.0.2" ]
+}
+
+@test "show --at through the server notices new tags" {
+    start_server
+    avakas_wrapper --socket "$SOCK" show "$REPO" --at HEAD
+    scan_lines "\"version\": \"0.0.1\", \"distance\": 0" "${lines[0]}"
+    commit_message "$REPO" "whorp"
+    tag_repo "$REPO" "0.0.2" "latest"
+    avakas_wrapper --socket "$SOCK" show "$REPO" --at HEAD --at HEAD~1
+    scan_lines "\"version\": \"0.0.2\", \"distance\": 0" "${lines[0]}"
+    scan_lines "\"version\": \"0.0.1\", \"distance\": 0" "${lines[1]}"
+}
+
+@test "query through the server notices new tags" {
+    start_server
+    avakas_wrapper --socket "$SOCK" query --latest ">=0" "$REPO"
+    [ "$output" == "0.0.1" ]
+    commit_message "$REPO" "whorp"
+    tag_repo "$REPO" "0.0.2" "latest"
+    avakas_wrapper --socket "$SOCK" query --latest ">=0" "$REPO"
+    [ "$output" == "0.0.2" ]
+}
+
+@test "bump and set through the server" {
+    start_server
+    avakas_wrapper --socket "$SOCK" bump "$REPO" patch
+    scan_lines "Version updated from 0.0.1 to 0.0.2" "${lines[@]}"
+    [ "$(git -C "$REPO_ORIGIN" rev-parse '0.0.2^{commit}')" == \
+      "$(git -C "$REPO" rev-parse HEAD)" ]
+    AVAKAS_SOCKET="$SOCK" avakas_wrapper set "$REPO" "0.1.0"
+    scan_lines "Version set to 0.1.0" "${lines[@]}"
+    avakas_wrapper show "$REPO"
+    [ "$output" == "0.1.0" ]
+}
+
+@test "problems are reported through the server" {
+    start_server
+    avakas_rc 1 --socket "$SOCK" show "$REPO" --flavor git-native \
+              --tag-prefix nope
+    avakas_wrapper --socket "$SOCK" show "$REPO"
+    [ "$output" == "0.0.1" ]
+}
+
+@test "only one server per socket" {
+    start_server
+    cd "$CIDIR"
+    run python -m avakas serve "$SOCK"
+    [ "$status" -eq 1 ]
+    scan_lines "Problem: An avakas server is already listening.+" "${lines[@]}"
+}
+
+@test "clients need a server" {
+    avakas_rc 1 --socket "$SOCK" show "$REPO"
+}
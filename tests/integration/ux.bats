@@ -31,3 +31,55 @@ teardown() {
     avakas_rc 2 not-a-real-command
     scan_lines "usage: avakas.+" "${lines[@]}"
 }
+
+@test "startup does not import git, pkg_resources or flavors" {
+    cd "$CIDIR"
+    run python -X importtime -c "import avakas.cli; avakas.cli.gen_arg_parser()"
+    [ "$status" -eq 0 ]
+    run scan_lines "\| +(git|pkg_resources|avakas\.flavors.*)$" "${lines[@]}"
+    [ "$status" -eq 1 ]
+}
+
+@test "showing a git-native version does not import git" {
+    REPO=$(fake_repo)
+    tag_repo "$REPO" "0.0.1" "latest"
+    cd "$CIDIR"
+    run python -X importtime -m avakas show "$REPO" --flavor git-native
+    [ "$status" -eq 0 ]
+    run scan_lines "\| +(git|pkg_resources)$" "${lines[@]}"
+    [ "$status" -eq 1 ]
+}
+
+@test "showing the avakas version does not scan distributions" {
+    cd "$CIDIR"
+    run python -X importtime -m avakas version
+    [ "$status" -eq 0 ]
+    run scan_lines "\| +pkg_resources$" "${lines[@]}"
+    [ "$status" -eq 1 ]
+}
+
+@test "timings are printed to stderr" {
+    REPO=$(fake_repo)
+    tag_repo "$REPO" "0.0.1" "latest"
+    cd "$CIDIR"
+    run coverage run -a --source "avakas" -m "avakas" \
+        show "$REPO" --flavor git-native --timings
+    [ "$status" -eq 0 ]
+    scan_lines "0.0.1" "${lines[@]}"
+    scan_lines "avakas timings:" "${lines[@]}"
+    scan_lines " +read +1 +[0-9.]+s" "${lines[@]}"
+    scan_lines " +history +[0-9]+ +[0-9.]+s" "${lines[@]}"
+}
+
+@test "profile writes timings or a cProfile dump" {
+    REPO=$(fake_repo)
+    tag_repo "$REPO" "0.0.1" "latest"
+    avakas_wrapper show "$REPO" --flavor git-native \
+                   --profile "${AVAKAS_TEST_DIR}/timings.json"
+    [ "$output" == "0.0.1" ]
+    grep -q '"phase": "tags"' "${AVAKAS_TEST_DIR}/timings.json"
+    avakas_wrapper show "$REPO" --flavor git-native --no-cache \
+                   --profile "${AVAKAS_TEST_DIR}/avakas.prof"
+    python -c "import pstats, sys; pstats.Stats(sys.argv[1])" \
+           "${AVAKAS_TEST_DIR}/avakas.prof"
+}